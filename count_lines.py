@@ -1,59 +1,694 @@
 import os
+import re
 import sys
-import matplotlib.pyplot as plt
+import csv
+import json
+import argparse
+import subprocess
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import timings
+from fswalk import iter_files
+from remove_comments import JS_LIKE_EXTENSIONS, PYTHON_EXTENSIONS, SKIP_DIRS
+
+# Rozmiar bloku czytanego z dysku przy liczeniu linii
+CHUNK_SIZE = 1 << 20
+
+CACHE_VERSION = 1
+
+def count_lines_in_bytes(data):
+    """Liczba linii w danych binarnych (ostatnia linia bez \\n też się liczy)"""
+    lines = data.count(b'\n')
+    if data and not data.endswith(b'\n'):
+        lines += 1
+    return lines
 
 def count_lines_in_file(filepath):
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return sum(1 for _ in f)
+    """Liczy linie czytając plik binarnie blokami (niezależnie od kodowania)
+
+    Ostatnia linia bez końcowego znaku nowej linii też jest liczona.
+    """
+    lines = 0
+    last_byte = b'\n'
+    with open(filepath, 'rb', buffering=0) as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            lines += chunk.count(b'\n')
+            last_byte = chunk[-1:]
+    if last_byte != b'\n':
+        lines += 1
+    return lines
+
+# Znaczące znaki dla maszyn stanów klasyfikujących linie
+_C_LIKE_TOKEN = re.compile(rb'//|/\*|["\'`]')
+_PYTHON_TOKEN = re.compile(rb'#|\'\'\'|"""|["\']')
+
+def _find_closing_quote(line, quote, pos):
+    """Pozycja za zamykającym cudzysłowem (z obsługą \\) lub -1"""
+    while True:
+        end = line.find(quote, pos)
+        if end == -1:
+            return -1
+        backslashes = 0
+        while end - backslashes - 1 >= pos and line[end - backslashes - 1] == 0x5C:
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return end + len(quote)
+        pos = end + 1
+
+def _classify_c_like(lines):
+    """Maszyna stanów dla C/C++/TS: komentarze //, /* */, napisy i `template`"""
+    code = comment = blank = 0
+    in_block = False
+    in_template = False
+    for line in lines:
+        if not line.strip():
+            blank += 1
+            continue
+        has_code = has_comment = False
+        pos = 0
+        if in_block:
+            end = line.find(b'*/')
+            has_comment = True
+            if end == -1:
+                comment += 1
+                continue
+            in_block = False
+            pos = end + 2
+        elif in_template:
+            has_code = True
+            end = _find_closing_quote(line, b'`', 0)
+            if end == -1:
+                code += 1
+                continue
+            in_template = False
+            pos = end
+
+        while True:
+            match = _C_LIKE_TOKEN.search(line, pos)
+            if match is None:
+                if line[pos:].strip():
+                    has_code = True
+                break
+            if line[pos:match.start()].strip():
+                has_code = True
+            token = match.group()
+            if token == b'//':
+                has_comment = True
+                break
+            if token == b'/*':
+                has_comment = True
+                end = line.find(b'*/', match.end())
+                if end == -1:
+                    in_block = True
+                    break
+                pos = end + 2
+                continue
+            has_code = True
+            end = _find_closing_quote(line, token, match.end())
+            if end == -1:
+                in_template = token == b'`'
+                break
+            pos = end
+
+        if has_code:
+            code += 1
+        elif has_comment:
+            comment += 1
+        else:
+            blank += 1
+    return code, comment, blank
+
+def _classify_python(lines):
+    """Maszyna stanów dla Pythona: komentarze #, docstringi i napisy"""
+    code = comment = blank = 0
+    in_triple = None  # (ogranicznik, czy_docstring)
+    for line in lines:
+        if not line.strip():
+            blank += 1
+            continue
+        has_code = has_comment = False
+        pos = 0
+        if in_triple is not None:
+            delimiter, is_doc = in_triple
+            if is_doc:
+                has_comment = True
+            else:
+                has_code = True
+            end = _find_closing_quote(line, delimiter, 0)
+            if end == -1:
+                if is_doc:
+                    comment += 1
+                else:
+                    code += 1
+                continue
+            in_triple = None
+            pos = end
+
+        while True:
+            match = _PYTHON_TOKEN.search(line, pos)
+            if match is None:
+                if line[pos:].strip():
+                    has_code = True
+                break
+            # Prefiks napisu (r, b, f, u) nie czyni linii kodem
+            before = line[pos:match.start()].strip()
+            token = match.group()
+            if token == b'#':
+                if before:
+                    has_code = True
+                has_comment = True
+                break
+            if len(token) == 3:
+                # Potrójny cudzysłów na początku instrukcji = docstring
+                is_doc = not has_code and (not before or before.lower() in (b'r', b'u', b'b', b'f', b'rb', b'br'))
+                if is_doc:
+                    has_comment = True
+                else:
+                    has_code = True
+                end = _find_closing_quote(line, token, match.end())
+                if end == -1:
+                    in_triple = (token, is_doc)
+                    break
+                pos = end
+                continue
+            has_code = True
+            end = _find_closing_quote(line, token, match.end())
+            if end == -1:
+                break
+            pos = end
+
+        if has_code:
+            code += 1
+        elif has_comment:
+            comment += 1
+        else:
+            blank += 1
+    return code, comment, blank
+
+def _classify_plain(lines):
+    """Języki bez znanej składni komentarzy: tylko kod i puste linie"""
+    blank = sum(1 for line in lines if not line.strip())
+    return len(lines) - blank, 0, blank
+
+def count_sloc_in_file(filepath):
+    """Zwraca [kod, komentarze, puste] dla pliku (suma = count_lines_in_file)
+
+    Język rozpoznawany jest po rozszerzeniu, tak jak w remove_comments.py.
+    """
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    lines = data.split(b'\n')
+    if lines and not lines[-1]:
+        lines.pop()
+
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext in PYTHON_EXTENSIONS:
+        return list(_classify_python(lines))
+    if ext in JS_LIKE_EXTENSIONS:
+        return list(_classify_c_like(lines))
+    return list(_classify_plain(lines))
 
 def count_lines_in_directory(directory, extension):
-    total_lines = 0
     # Przetwarzaj tylko pliki w katalogu bez podkatalogów
-    for file in os.listdir(directory):
-        full_path = os.path.join(directory, file)
-        if os.path.isfile(full_path) and file.endswith(extension):
-            total_lines += count_lines_in_file(full_path)
-    return total_lines
+    return sum(get_files_with_lines(directory, extension).values())
+
+def default_cache_path():
+    """Ścieżka pliku cache w katalogu cache użytkownika"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA') \
+        or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'count_lines', 'counts.json')
+
+class CountCache:
+    """Trwały cache wyników per plik, kluczem jest (ścieżka, rozmiar, mtime)
+
+    Dla jednego pliku można trzymać kilka rodzajów wyników (kind), np. liczbę
+    linii; zmiana rozmiaru lub mtime unieważnia wszystkie naraz.
+    """
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path or default_cache_path()
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            pass
+
+    def get(self, path, stat_result, kind):
+        entry = self.entries.get(os.path.abspath(path))
+        if entry is not None and entry[0] == stat_result.st_size and entry[1] == stat_result.st_mtime_ns:
+            value = entry[2].get(kind)
+            if value is not None:
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, path, stat_result, kind, value):
+        key = os.path.abspath(path)
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != stat_result.st_size or entry[1] != stat_result.st_mtime_ns:
+            entry = self.entries[key] = [stat_result.st_size, stat_result.st_mtime_ns, {}]
+        entry[2][kind] = value
+        self.dirty = True
+
+    def prune(self, directory, present_paths):
+        """Usuwa wpisy usuniętych plików z katalogu
+
+        Wpis pliku spoza ostatniego skanu (inne rozszerzenie, --ignore,
+        .gitignore) zostaje, dopóki plik istnieje - inaczej przebiegi z różnymi
+        filtrami kasowałyby sobie nawzajem cache.
+        """
+        prefix = os.path.join(os.path.abspath(directory), '')
+        present = {os.path.abspath(path) for path in present_paths}
+        stale = [key for key in self.entries
+                 if key.startswith(prefix) and key not in present and not os.path.lexists(key)]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'entries': self.entries}, f)
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+def find_files_recursive(directory, extension, ignore_patterns=()):
+    """Zwraca listę (ścieżka względna, stat) plików z rozszerzeniem w całym drzewie
+
+    Pomija katalogi z remove_comments.SKIP_DIRS oraz .git, a także ścieżki
+    pasujące do plików .gitignore napotkanych po drodze i do ignore_patterns.
+    """
+    files = _collect_stats(iter_files(directory, lambda name: name.endswith(extension),
+                                      skip_dirs=SKIP_DIRS | {'.git'}, gitignore=True,
+                                      ignore_patterns=ignore_patterns))
+    files.sort(key=lambda item: item[0])
+    return files
+
+def find_files(directory, extension):
+    """Zwraca listę (nazwa, stat) plików z rozszerzeniem w samym katalogu"""
+    files = _collect_stats(iter_files(directory, lambda name: name.endswith(extension),
+                                      recursive=False))
+    files.sort(key=lambda item: item[0])
+    return files
+
+def _collect_stats(found):
+    files = []
+    for rel_path, entry in found:
+        try:
+            files.append((rel_path, entry.stat()))
+        except OSError:
+            pass
+    return files
+
+def _count_many(paths, jobs=None, counter=count_lines_in_file):
+    """Liczy linie w wielu plikach, przy większej liczbie plików w puli procesów"""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(paths) < 2 * jobs:
+        return [counter(path) for path in paths]
+
+    # Import dopiero tutaj - multiprocessing wydłuża start skryptu
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Paczki po kilka plików - mniej komunikacji między procesami
+    chunksize = max(1, len(paths) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(counter, paths, chunksize=chunksize))
+
+def collect_line_counts(directory, extension, recursive=False, ignore_patterns=(), jobs=None,
+                        cache=None, sloc=False):
+    """Jeden skan katalogu - zwraca słownik {ścieżka względna: liczba linii}
+
+    Wynik służy zarówno do sumy, jak i do wykresu czy podsumowań. Z cache
+    (CountCache) czytane są tylko pliki, których rozmiar lub mtime się zmienił.
+    extension może być krotką rozszerzeń. Z sloc=True wartościami są
+    listy [kod, komentarze, puste].
+    """
+    kind, counter = ('sloc', count_sloc_in_file) if sloc else ('lines', count_lines_in_file)
+    with timings.phase('scan'):
+        if recursive:
+            files = find_files_recursive(directory, extension, ignore_patterns)
+        else:
+            files = find_files(directory, extension)
 
-def get_files_with_lines(directory, extension):
-    """Zwraca słownik z plikami i ilością linii"""
     files_data = {}
-    for file in os.listdir(directory):
-        full_path = os.path.join(directory, file)
-        if os.path.isfile(full_path) and file.endswith(extension):
-            files_data[file] = count_lines_in_file(full_path)
-    return files_data
+    to_count = []
+    with timings.phase('cache'):
+        for rel_path, stat_result in files:
+            full_path = os.path.join(directory, rel_path)
+            lines = cache.get(full_path, stat_result, kind) if cache is not None else None
+            if lines is None:
+                to_count.append((rel_path, full_path, stat_result))
+            else:
+                files_data[rel_path] = lines
+
+    with timings.phase('count'):
+        counts = _count_many([full_path for _, full_path, _ in to_count], jobs, counter)
+        if timings.enabled():
+            timings.count(files=len(to_count),
+                          nbytes=sum(stat_result.st_size for _, _, stat_result in to_count))
+    for (rel_path, full_path, stat_result), lines in zip(to_count, counts):
+        files_data[rel_path] = lines
+        if cache is not None:
+            cache.put(full_path, stat_result, kind, lines)
+
+    if cache is not None and recursive:
+        cache.prune(directory, [os.path.join(directory, rel_path) for rel_path, _ in files])
+
+    return {rel_path: files_data[rel_path] for rel_path, _ in files}
+
+def count_lines_recursive(directory, extension, ignore_patterns=(), jobs=None, cache=None):
+    """Liczy linie w całym drzewie równolegle w puli procesów
+
+    Zwraca słownik {ścieżka względna: liczba linii}.
+    """
+    return collect_line_counts(directory, extension, True, ignore_patterns, jobs, cache)
+
+def _line_total(value):
+    """Liczba linii z wartości wyniku (int albo [kod, komentarze, puste])"""
+    return value if isinstance(value, int) else sum(value)
 
-def plot_lines_chart(files_data):
+def _add_counts(a, b):
+    if isinstance(b, int):
+        return a + b
+    return [x + y for x, y in zip(a, b)]
+
+def _zero_counts(files_data):
+    """Zerowa wartość w tym samym kształcie co wyniki (int albo [0, 0, 0])"""
+    sloc = any(not isinstance(value, int) for value in files_data.values())
+    return [0, 0, 0] if sloc else 0
+
+def summarize_lines(files_data):
+    """Agreguje liczby linii (lub podział SLOC) per katalog i per rozszerzenie"""
+    per_directory = {}
+    per_extension = {}
+    empty = _zero_counts(files_data)
+    for rel_path, value in files_data.items():
+        dir_key = os.path.dirname(rel_path) or '.'
+        ext_key = os.path.splitext(rel_path)[1].lower()
+        per_directory[dir_key] = _add_counts(per_directory.get(dir_key, empty), value)
+        per_extension[ext_key] = _add_counts(per_extension.get(ext_key, empty), value)
+    return per_directory, per_extension
+
+def _format_counts(value):
+    if isinstance(value, int):
+        return f"{value:>10}"
+    code, comment, blank = value
+    return f"{sum(value):>10} {code:>10} {comment:>10} {blank:>10}"
+
+def print_summary(files_data):
+    """Wypisuje podsumowanie per katalog i per rozszerzenie"""
+    per_directory, per_extension = summarize_lines(files_data)
+    sloc = not isinstance(_zero_counts(files_data), int)
+    header = f"{'razem':>10} {'kod':>10} {'komentarze':>10} {'puste':>10}" if sloc else ""
+
+    print("\nLinie per rozszerzenie:")
+    if sloc:
+        print(f"  {'':<12} {header}")
+    for ext, value in sorted(per_extension.items(), key=lambda item: -_line_total(item[1])):
+        print(f"  {ext or '(brak)':<12} {_format_counts(value)}")
+    print("\nLinie per katalog:")
+    if sloc:
+        print(f"  {header}")
+    for dir_path, value in sorted(per_directory.items(), key=lambda item: -_line_total(item[1])):
+        print(f"  {_format_counts(value)}  {dir_path}")
+
+def write_json_report(files_data, out=sys.stdout):
+    """Zapisuje wyniki (pliki, katalogi, rozszerzenia, suma) jako JSON"""
+    per_directory, per_extension = summarize_lines(files_data)
+
+    def as_record(value):
+        if isinstance(value, int):
+            return {"lines": value}
+        code, comment, blank = value
+        return {"lines": sum(value), "code": code, "comment": comment, "blank": blank}
+
+    total = _zero_counts(files_data)
+    for value in files_data.values():
+        total = _add_counts(total, value)
+    report = {
+        "total": as_record(total),
+        "extensions": {ext: as_record(value) for ext, value in per_extension.items()},
+        "directories": {path: as_record(value) for path, value in per_directory.items()},
+        "files": {path: as_record(value) for path, value in files_data.items()},
+    }
+    json.dump(report, out, indent=2, ensure_ascii=False)
+    out.write("\n")
+
+def write_csv_report(files_data, out=sys.stdout):
+    """Zapisuje wyniki per plik jako CSV"""
+    writer = csv.writer(out)
+    sloc = not isinstance(_zero_counts(files_data), int)
+    header = ["path", "extension", "lines"]
+    if sloc:
+        header += ["code", "comment", "blank"]
+    writer.writerow(header)
+    for rel_path, value in files_data.items():
+        row = [rel_path, os.path.splitext(rel_path)[1].lower(), _line_total(value)]
+        if sloc:
+            row += list(value)
+        writer.writerow(row)
+
+def get_files_with_lines(directory, extension, cache=None):
+    """Zwraca słownik z plikami i ilością linii"""
+    return collect_line_counts(directory, extension, cache=cache)
+
+class GitObjectReader:
+    """Czyta obiekty git przez jeden długo działający proces `git cat-file --batch`"""
+
+    def __init__(self, repo):
+        self.process = subprocess.Popen(
+            ['git', '-C', repo, 'cat-file', '--batch'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def read(self, sha):
+        """Zwraca (typ, zawartość) obiektu"""
+        self.process.stdin.write(sha.encode('ascii') + b'\n')
+        self.process.stdin.flush()
+        header = self.process.stdout.readline().split()
+        if len(header) != 3:
+            raise ValueError(f"Brak obiektu git: {sha}")
+        size = int(header[2])
+        data = self.process.stdout.read(size)
+        self.process.stdout.read(1)  # końcowy \n
+        return header[1].decode('ascii'), data
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+def _parse_tree(data):
+    """Generator (tryb, nazwa, sha) z binarnego obiektu tree"""
+    pos = 0
+    while pos < len(data):
+        space = data.index(b' ', pos)
+        nul = data.index(b'\0', space)
+        mode = data[pos:space]
+        name = data[space + 1:nul].decode('utf-8', errors='replace')
+        sha = data[nul + 1:nul + 21].hex()
+        pos = nul + 21
+        yield mode, name, sha
+
+class HistoryCounter:
+    """Liczy linie per rozszerzenie dla drzew kolejnych commitów
+
+    Liczby linii są zapamiętywane per SHA blobu, a sumy per SHA drzewa, więc
+    pliki i katalogi niezmienione między commitami nie są ponownie czytane.
+    """
+
+    def __init__(self, repo, extensions):
+        self.reader = GitObjectReader(repo)
+        self.extensions = extensions
+        self.blob_lines = {}
+        self.tree_totals = {}
+
+    def _tree_totals(self, tree_sha):
+        totals = self.tree_totals.get(tree_sha)
+        if totals is not None:
+            return totals
+
+        totals = defaultdict(int)
+        _, data = self.reader.read(tree_sha)
+        for mode, name, sha in _parse_tree(data):
+            if mode == b'40000':
+                for ext, lines in self._tree_totals(sha).items():
+                    totals[ext] += lines
+            elif mode in (b'100644', b'100755') and name.endswith(self.extensions):
+                lines = self.blob_lines.get(sha)
+                if lines is None:
+                    lines = self.blob_lines[sha] = count_lines_in_bytes(self.reader.read(sha)[1])
+                totals[os.path.splitext(name)[1].lower()] += lines
+            # Dowiązania (120000) i submoduły (160000) są pomijane
+
+        totals = self.tree_totals[tree_sha] = dict(totals)
+        return totals
+
+    def count_commit(self, commit_sha):
+        """Zwraca (czas commita, {rozszerzenie: liczba linii})"""
+        _, data = self.reader.read(commit_sha)
+        tree_sha = None
+        timestamp = 0
+        for line in data.split(b'\n'):
+            if not line:
+                break  # koniec nagłówków, dalej jest opis commita
+            if line.startswith(b'tree '):
+                tree_sha = line[5:].decode('ascii')
+            elif line.startswith(b'committer '):
+                timestamp = int(line.rsplit(b' ', 2)[1])
+        when = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+        return when, self._tree_totals(tree_sha)
+
+    def close(self):
+        self.reader.close()
+
+def count_lines_history(repo, extensions, rev='HEAD', max_count=None):
+    """Szereg czasowy linii per rozszerzenie wzdłuż historii (first-parent)
+
+    Zwraca listę (sha, czas, {rozszerzenie: liczba linii}) od najstarszego.
+    """
+    command = ['git', '-C', repo, 'rev-list', '--first-parent', '--reverse', rev]
+    if max_count:
+        # rev-list --reverse stosuje limit przed odwróceniem, więc to N najnowszych
+        command.insert(4, f'--max-count={max_count}')
+    commits = subprocess.run(command, check=True, capture_output=True, text=True).stdout.split()
+
+    counter = HistoryCounter(repo, extensions)
+    try:
+        series = []
+        with timings.phase('history'):
+            for commit_sha in commits:
+                when, totals = counter.count_commit(commit_sha)
+                series.append((commit_sha, when, totals))
+        return series
+    finally:
+        counter.close()
+
+def history_to_chart_data(series):
+    """Zamienia szereg historii na słownik {etykieta commita: linie} dla plot_lines_chart"""
+    return {f"{when:%Y-%m-%d} {sha[:7]}": sum(totals.values()) for sha, when, totals in series}
+
+def print_history(series, out=sys.stdout, fmt="text"):
+    """Wypisuje szereg historii jako tabelę, JSON lub CSV"""
+    columns = sorted({ext for _, _, totals in series for ext in totals})
+    if fmt == "json":
+        json.dump([{"commit": sha, "date": when.isoformat(), "total": sum(totals.values()),
+                    "extensions": totals} for sha, when, totals in series], out, indent=2)
+        out.write("\n")
+    elif fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(["commit", "date", "total"] + columns)
+        for sha, when, totals in series:
+            writer.writerow([sha, when.isoformat(), sum(totals.values())]
+                            + [totals.get(ext, 0) for ext in columns])
+    else:
+        print(f"{'data':<10} {'commit':<8} {'razem':>10} " + " ".join(f"{ext:>10}" for ext in columns),
+              file=out)
+        for sha, when, totals in series:
+            print(f"{when:%Y-%m-%d} {sha[:7]:<8} {sum(totals.values()):>10} "
+                  + " ".join(f"{totals.get(ext, 0):>10}" for ext in columns), file=out)
+
+def plot_lines_chart(files_data, title='Liczba linii w każdym pliku', ylabel='Nazwa pliku'):
     """Tworzy poziomy wykres słupkowy"""
     if not files_data:
         print("Brak plików do wyświetlenia")
         return
-    
+
+    # matplotlib ładuje się setki milisekund - tylko gdy wykres jest potrzebny
+    import matplotlib.pyplot as plt
+
     filenames = list(files_data.keys())
-    line_counts = list(files_data.values())
+    line_counts = [_line_total(value) for value in files_data.values()]
     
     plt.figure(figsize=(10, 6))
     plt.barh(filenames, line_counts, color='steelblue')
     plt.xlabel('Liczba linii', fontsize=12)
-    plt.ylabel('Nazwa pliku', fontsize=12)
-    plt.title('Liczba linii w każdym pliku', fontsize=14, fontweight='bold')
+    plt.ylabel(ylabel, fontsize=12)
+    plt.title(title, fontsize=14, fontweight='bold')
     plt.tight_layout()
     plt.grid(axis='x', alpha=0.3)
     plt.show()
 
+def main():
+    parser = argparse.ArgumentParser(description="Liczy linie w plikach o podanych rozszerzeniach")
+    parser.add_argument("extension", help="Rozszerzenie plików (np. .py) lub kilka po przecinku (.py,.ts)")
+    parser.add_argument("directory", nargs='?', default=".",
+                        help="Katalog do przeszukania (domyślnie bieżący)")
+    parser.add_argument("--chart", action="store_true", help="Pokaż wykres linii per plik")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Przeszukuj podkatalogi (z regułami .gitignore)")
+    parser.add_argument("--ignore", action="append", default=[], metavar="WZORZEC",
+                        help="Dodatkowy wzorzec w stylu .gitignore (można powtarzać)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument("--sloc", action="store_true",
+                        help="Dziel linie na kod, komentarze i puste")
+    parser.add_argument("--format", choices=["text", "json", "csv"], default="text",
+                        help="Format wyniku (domyślnie text)")
+    parser.add_argument("--history", action="store_true",
+                        help="Liczby linii w kolejnych commitach repozytorium git (katalog = repozytorium)")
+    parser.add_argument("--rev", default="HEAD",
+                        help="Rewizja, od której liczona jest historia (domyślnie HEAD)")
+    parser.add_argument("--max-commits", type=int, default=None,
+                        help="Tylko N ostatnich commitów historii")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Nie używaj cache wyników per plik")
+    parser.add_argument("--cache-file", default=None,
+                        help=f"Plik cache (domyślnie {default_cache_path()})")
+    timings.add_arguments(parser)
+    args = parser.parse_intermixed_args()
+    with timings.session(args):
+        extensions = tuple(ext.strip() for ext in args.extension.split(',') if ext.strip())
+        extension = ', '.join(extensions)
+        directory = args.directory
+        show_chart = args.chart
+
+        if args.history:
+            if args.sloc:
+                parser.error("--sloc nie jest obsługiwane razem z --history")
+            series = count_lines_history(directory, extensions, args.rev, args.max_commits)
+            print_history(series, fmt=args.format)
+            if show_chart:
+                with timings.phase('chart'):
+                    plot_lines_chart(history_to_chart_data(series), title='Liczba linii w historii',
+                                     ylabel='Commit')
+            return
+
+        cache = None if args.no_cache else CountCache(args.cache_file)
+
+        # Jeden skan - ten sam wynik dla sumy, podsumowania, raportu i wykresu
+        files_data = collect_line_counts(directory, extensions, args.recursive, args.ignore,
+                                         args.jobs, cache, sloc=args.sloc)
+        if cache is not None:
+            with timings.phase('cache'):
+                cache.save()
+
+        if args.format == "json":
+            write_json_report(files_data)
+        elif args.format == "csv":
+            write_csv_report(files_data)
+        else:
+            total = sum(_line_total(value) for value in files_data.values())
+            print(f"Łączna liczba linii w plikach z rozszerzeniem {extension}: {total}")
+            if args.recursive or args.sloc or len(extensions) > 1:
+                print_summary(files_data)
+
+        if show_chart:
+            with timings.phase('chart'):
+                plot_lines_chart(files_data)
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python count_lines.py <extension> [directory] [--chart]")
-        sys.exit(1)
-        
-    extension = sys.argv[1]
-    directory = sys.argv[2] if len(sys.argv) > 2 else "."
-    show_chart = "--chart" in sys.argv
-    
-    total = count_lines_in_directory(directory, extension)
-    print(f"Łączna liczba linii w plikach z rozszerzeniem {extension}: {total}")
-    
-    if show_chart:
-        files_data = get_files_with_lines(directory, extension)
-        plot_lines_chart(files_data)
+    main()
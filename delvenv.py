@@ -1,48 +1,334 @@
 import os
+import sys
+import errno
 import shutil
 import argparse
+import json
+import tempfile
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import timings
+from fswalk import walk
+
+# Markery środowiska wirtualnego (poza pyvenv.cfg) względem katalogu venv
+WINDOWS_VENV_MARKERS = ("Scripts", ("activate.bat", "python.exe", "pip.exe"))
+LINUX_VENV_MARKERS = ("bin", ("activate", "python", "pip"))
+
+# Elementy venv do usunięcia na Windows
+WINDOWS_VENV_ITEMS = ['Include', 'Lib', 'Scripts', 'pyvenv.cfg']
+
+# Elementy venv do usunięcia na Linux/Mac
+LINUX_VENV_ITEMS = ['bin', 'lib', 'include', 'share', 'pyvenv.cfg']
+
+# Kosz, do którego przenoszona jest zawartość venv przed właściwym usunięciem
+TRASH_DIR_NAME = '.delvenv-trash'
+
+# Katalogi, do których walker nigdy nie wchodzi
+SKIP_DIRS = {'.git', 'node_modules', TRASH_DIR_NAME}
+
+# Liczba wątków liczących rozmiar (praca ograniczona przez I/O, nie CPU)
+SIZE_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+DELETE_WORKERS = SIZE_WORKERS
+
+# Plik indeksu skanowania (opcja --cache)
+CACHE_FILE_NAME = '.delvenv-cache.json'
+CACHE_VERSION = 1
+
+# Głębokość, do której kosz jest dzielony na niezależne zadania usuwania
+# (kosz/<venv>/lib/python3.x/site-packages/<pakiet>)
+PURGE_SPLIT_DEPTH = 4
+
+def _has_venv_markers(folder_path, names):
+    """Sprawdza markery venv mając już listę nazw wpisów w folderze"""
+    if "pyvenv.cfg" in names:
+        return True
+    
+    # Stat na markerach tylko gdy istnieje Scripts/ lub bin/
+    for scripts_dir, markers in (WINDOWS_VENV_MARKERS, LINUX_VENV_MARKERS):
+        if scripts_dir in names:
+            base = os.path.join(folder_path, scripts_dir)
+            if any(os.path.exists(os.path.join(base, marker)) for marker in markers):
+                return True
+    return False
+
 def is_venv_folder(folder_path):
     """Sprawdza czy folder jest środowiskiem wirtualnym Python"""
-    folder = Path(folder_path)
+    try:
+        names = set(os.listdir(folder_path))
+    except OSError:
+        return False
+    return _has_venv_markers(folder_path, names)
+
+def _site_packages_dirs(venv_path):
+    """Ścieżki katalogów site-packages venv (Windows i lib/python3.x)"""
+    paths = [os.path.join(venv_path, 'Lib', 'site-packages')]
+    try:
+        with os.scandir(os.path.join(venv_path, 'lib')) as entries:
+            for entry in entries:
+                if entry.name.startswith('python'):
+                    paths.append(os.path.join(entry.path, 'site-packages'))
+    except OSError:
+        pass
+    return paths
+
+def _venv_signature(venv_path):
+    """Lista (ścieżka, mtime) katalogów, których zmiana oznacza zmianę rozmiaru venv"""
+    candidates = [venv_path]
+    for item_name in sorted(set(WINDOWS_VENV_ITEMS + LINUX_VENV_ITEMS)):
+        candidates.append(os.path.join(venv_path, item_name))
+    candidates.extend(_site_packages_dirs(venv_path))
     
-    # Sprawdź plik pyvenv.cfg (standardowy marker venv)
-    if (folder / "pyvenv.cfg").exists():
-        return True
+    signature = []
+    for path in candidates:
+        try:
+            signature.append([path, os.stat(path, follow_symlinks=False).st_mtime_ns])
+        except OSError:
+            pass
+    return signature
+
+def venv_last_used(venv_path):
+    """Szacuje czas ostatniego użycia venv
+    
+    Interpreter venv przy każdym starcie czyta pyvenv.cfg (atime), a
+    instalacja pakietów zmienia mtime site-packages. Atime site-packages
+    nie jest brany pod uwagę - zmienia go już samo listowanie katalogu, także
+    przy liczeniu rozmiaru przez delvenv, a pyvenv.cfg delvenv tylko
+    lstatuje. bin/python to zwykle dowiązanie: jego lstat daje czas
+    utworzenia venv, a stat - użycie interpretera systemowego z dowolnego
+    miejsca, więc nie jest brany pod uwagę (Scripts/python.exe na Windows
+    to kopia, więc tak).
+    """
+    times = []
+    for path in (os.path.join(venv_path, 'pyvenv.cfg'), os.path.join(venv_path, 'Scripts', 'python.exe')):
+        try:
+            st = os.stat(path)
+            times.append(max(st.st_atime, st.st_mtime))
+        except OSError:
+            pass
+    for path in _site_packages_dirs(venv_path):
+        try:
+            times.append(os.stat(path).st_mtime)
+        except OSError:
+            pass
+    if not times:
+        try:
+            times.append(os.stat(venv_path).st_mtime)
+        except OSError:
+            times.append(0)
+    return max(times)
+
+def rank_venvs_by_staleness(venv_paths, scan_cache=None):
+    """Sortuje venv od najdawniej używanych; w obrębie tego samego dnia
+    większe idą pierwsze
+    
+    Rozmiary do rankingu pochodzą tylko z cache (--cache) - bez niego venv
+    z tego samego dnia są po prostu uporządkowane wg czasu użycia, a
+    rozmiary liczone są dopiero przy przetwarzaniu.
+    """
+    ranked = []
+    for venv_path in venv_paths:
+        last_used = venv_last_used(venv_path)
+        known_size = scan_cache.peek_venv_size(venv_path) if scan_cache is not None else None
+        ranked.append((int(last_used // 86400), -(known_size or 0), last_used, venv_path))
+    ranked.sort()
+    return [(venv_path, last_used) for _, _, last_used, venv_path in ranked]
+
+class ScanCache:
+    """Trwały indeks skanowania: mtime katalogów i rozmiary znalezionych venv
+    
+    Katalog, którego mtime się nie zmienił, ma tę samą listę podkatalogów,
+    więc walker nie musi go listować - wystarczy jeden stat. Rozmiar venv
+    jest używany ponownie, dopóki nie zmieni się mtime żadnego z katalogów
+    z jego sygnatury (m.in. site-packages). Rozmiary z cache mają
+    deduplikację twardych dowiązań z przebiegu, w którym je zmierzono.
+    """
+    
+    def __init__(self, cache_path):
+        self.cache_path = Path(cache_path)
+        self.dirs = {}
+        self.venvs = {}
+        self.new_dirs = {}
+        self.new_venvs = {}
+        self.stats = {"dirs_reused": 0, "dirs_scanned": 0, "sizes_reused": 0}
+        self._load()
+    
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == CACHE_VERSION:
+            self.dirs = data.get("dirs", {})
+            self.venvs = data.get("venvs", {})
+    
+    def save(self):
+        """Zapisuje tylko wpisy odwiedzone w tym przebiegu (usunięte katalogi znikają)"""
+        data = {"version": CACHE_VERSION, "dirs": self.new_dirs, "venvs": self.new_venvs}
+        tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.cache_path)
+    
+    def lookup_dir(self, dir_path, mtime_ns):
+        """Zwraca (czy_venv, nazwy podkatalogów) jeśli katalog się nie zmienił"""
+        cached = self.dirs.get(dir_path)
+        if cached is None or cached[0] != mtime_ns:
+            return None
+        self.new_dirs[dir_path] = cached
+        self.stats["dirs_reused"] += 1
+        return cached[1], cached[2]
+    
+    def store_dir(self, dir_path, mtime_ns, is_venv, subdir_names):
+        self.new_dirs[dir_path] = [mtime_ns, is_venv, subdir_names]
+        self.stats["dirs_scanned"] += 1
+    
+    def lookup_venv(self, venv_path):
+        """Zwraca (rozmiar, elementy) z cache jeśli venv się nie zmienił"""
+        key = os.fspath(venv_path)
+        cached = self.venvs.get(key)
+        if cached is None or cached["signature"] != _venv_signature(key):
+            return None
+        self.new_venvs[key] = cached
+        self.stats["sizes_reused"] += 1
+        return cached["size"], cached["items"]
+    
+    def peek_venv_size(self, venv_path):
+        """Rozmiar z poprzedniego skanu bez walidacji (tylko do rankingu)"""
+        cached = self.venvs.get(os.fspath(venv_path))
+        return cached["size"] if cached is not None else None
+    
+    def keep_venv(self, venv_path):
+        """Przenosi wpis venv do nowego indeksu bez sprawdzania (venv nie był przetwarzany)"""
+        key = os.fspath(venv_path)
+        if key in self.venvs and key not in self.new_venvs:
+            self.new_venvs[key] = self.venvs[key]
+    
+    def store_venv(self, venv_path, size, items):
+        key = os.fspath(venv_path)
+        self.new_venvs[key] = {"size": size, "items": items, "signature": _venv_signature(key)}
+    
+    def forget_venv(self, venv_path):
+        self.new_venvs.pop(os.fspath(venv_path), None)
+
+def iter_venv_folders(root_path, scan_cache=None):
+    """Generator folderów venv pod root_path (bez samego root_path)
+    
+    Każdy katalog jest listowany dokładnie raz przez os.scandir, a typ wpisu
+    pochodzi z DirEntry. Do znalezionych venv (lib/site-packages) ani do
+    katalogów z SKIP_DIRS walker nie wchodzi. Dowiązania symboliczne do
+    katalogów nie są śledzone. Z scan_cache niezmienione katalogi (ten sam
+    mtime) nie są ponownie listowane.
+    """
+    root = os.fspath(root_path)
+    stack = [root]
+    
+    while stack:
+        current = stack.pop()
+        
+        cached = None
+        if scan_cache is not None:
+            try:
+                mtime_ns = os.stat(current, follow_symlinks=False).st_mtime_ns
+            except OSError:
+                continue
+            cached = scan_cache.lookup_dir(current, mtime_ns)
+        
+        if cached is not None:
+            is_venv, subdir_names = cached
+            subdirs = [os.path.join(current, name) for name in subdir_names]
+        else:
+            try:
+                with os.scandir(current) as entries:
+                    entries = list(entries)
+            except OSError:
+                continue
+            
+            names = {entry.name for entry in entries}
+            is_venv = current != root and _has_venv_markers(current, names)
+            
+            subdirs = []
+            if not is_venv:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False) and entry.name not in SKIP_DIRS:
+                            subdirs.append(entry.path)
+                    except OSError:
+                        pass
+            
+            if scan_cache is not None:
+                scan_cache.store_dir(current, mtime_ns, is_venv,
+                                     [os.path.basename(path) for path in subdirs])
+        
+        if is_venv:
+            yield Path(current)
+            continue
+        
+        # Odwrócona kolejność na stosie = przechodzenie w porządku alfabetycznym
+        stack.extend(sorted(subdirs, reverse=True))
+
+def disk_usage(stat_result):
+    """Zwraca miejsce zajmowane na dysku (st_blocks), a gdy brak - rozmiar pozorny"""
+    blocks = getattr(stat_result, 'st_blocks', None)
+    if blocks is None:
+        return stat_result.st_size
+    return blocks * 512
+
+def _count_usage(stat_result, seen):
+    """Rozmiar wpisu, przy czym twarde dowiązania liczone są tylko raz"""
+    if stat_result.st_nlink > 1 and stat_result.st_ino:
+        key = (stat_result.st_dev, stat_result.st_ino)
+        if key in seen:
+            return 0
+        seen.add(key)
+    return disk_usage(stat_result)
+
+def get_folder_size(folder_path, seen=None, executor=None):
+    """Oblicza miejsce zajmowane przez folder na dysku w bajtach
+    
+    Katalogi skanowane są równolegle w puli wątków (wraz z lstat wpisów).
+    Pliki o tym samym (st_dev, st_ino) liczone są raz - także między
+    wywołaniami, jeśli przekazany zostanie wspólny zbiór seen.
+    """
+    if seen is None:
+        seen = set()
     
-    # Sprawdź strukturę Windows venv
-    windows_markers = [
-        folder / "Scripts" / "activate.bat",
-        folder / "Scripts" / "python.exe",
-        folder / "Scripts" / "pip.exe"
-    ]
-    
-    # Sprawdź strukturę Linux/Mac venv
-    linux_markers = [
-        folder / "bin" / "activate",
-        folder / "bin" / "python",
-        folder / "bin" / "pip"
-    ]
-    
-    # Jeśli istnieje jakikolwiek marker, to prawdopodobnie venv
-    return any(marker.exists() for marker in windows_markers + linux_markers)
-
-def get_folder_size(folder_path):
-    """Oblicza rozmiar folderu w bajtach"""
     total_size = 0
-    try:
-        for dirpath, dirnames, filenames in os.walk(folder_path):
-            for filename in filenames:
-                filepath = os.path.join(dirpath, filename)
-                try:
-                    total_size += os.path.getsize(filepath)
-                except (OSError, FileNotFoundError):
-                    pass
-    except (OSError, FileNotFoundError):
-        pass
+    for _, _, dirs, files in walk(folder_path, prefetch_stat=True, workers=SIZE_WORKERS, executor=executor):
+        # Deduplikacja w wątku głównym - seen nie wymaga blokady
+        for entry in dirs + files:
+            try:
+                total_size += _count_usage(entry.stat(follow_symlinks=False), seen)
+            except OSError:
+                pass
+        timings.count(files=len(files))
     return total_size
 
+SIZE_UNITS = {'B': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4, 'P': 1024 ** 5}
+
+def parse_size(text):
+    """Zamienia rozmiar w postaci "50 GB", "500M", "1.5T" na bajty (jednostki 1024)"""
+    value = text.strip().upper().replace(' ', '')
+    if value.endswith('IB'):
+        value = value[:-2]
+    elif value.endswith('B') and len(value) > 1 and value[-2] in SIZE_UNITS:
+        value = value[:-1]
+    
+    multiplier = 1
+    if value and value[-1] in SIZE_UNITS:
+        multiplier = SIZE_UNITS[value[-1]]
+        value = value[:-1]
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Niepoprawny rozmiar: {text}")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"Niepoprawny rozmiar: {text}")
+    return int(number * multiplier)
+
 def format_size(size_bytes):
     """Formatuje rozmiar w czytelnej formie"""
     for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
@@ -51,18 +337,124 @@ def format_size(size_bytes):
         size_bytes /= 1024
     return f"{size_bytes:.2f} PB"
 
-def remove_venv_contents(venv_folder, dry_run=True):
-    """Usuwa tylko zawartość venv, zachowując inne pliki użytkownika"""
-    folder = Path(venv_folder)
+def _delete_path(path):
+    """Usuwa plik lub drzewo katalogów (bez śledzenia dowiązań)"""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.unlink(path)
+
+def move_to_trash(item_path, trash_dir):
+    """Przenosi element venv do kosza jednym rename (atomowo, natychmiast)
     
-    # Elementy venv do usunięcia na Windows
-    windows_venv_items = ['Include', 'Lib', 'Scripts', 'pyvenv.cfg']
+    Zwraca nową ścieżkę elementu w koszu albo None, gdy kosz jest na innym
+    systemie plików - element zostaje wtedy na miejscu.
+    """
+    item_path = Path(item_path)
+    os.makedirs(trash_dir, exist_ok=True)
+    # Osobny podkatalog na każdy element - nazwy nie kolidują między venv
+    slot = tempfile.mkdtemp(prefix=f"{item_path.parent.name}-", dir=trash_dir)
+    target = Path(slot) / item_path.name
+    try:
+        os.rename(item_path, target)
+        return target
+    except OSError as e:
+        os.rmdir(slot)
+        if e.errno != errno.EXDEV:
+            raise
+    return None
+
+def _iter_purge_units(path, depth):
+    """Dzieli drzewo na niezależne ścieżki do usunięcia równolegle"""
+    try:
+        with os.scandir(path) as entries:
+            entries = list(entries)
+    except OSError:
+        yield path
+        return
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+        except OSError:
+            is_dir = False
+        if is_dir and depth > 1:
+            yield from _iter_purge_units(entry.path, depth - 1)
+        else:
+            yield entry.path
+
+def _purge_unit(path):
+    try:
+        _delete_path(path)
+        return None
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        return f"{path}: {e}"
+
+def purge_trash(trash_dir, workers=DELETE_WORKERS, show_progress=True):
+    """Usuwa zawartość kosza w puli wątków
     
-    # Elementy venv do usunięcia na Linux/Mac
-    linux_venv_items = ['bin', 'lib', 'include', 'share', 'pyvenv.cfg']
+    Błędy nie przerywają pracy - nieusunięte elementy zostają w koszu
+    i zostaną usunięte przy kolejnym uruchomieniu (--purge-trash).
+    Zwraca listę błędów.
+    """
+    if not os.path.isdir(trash_dir):
+        return []
+    
+    units = list(_iter_purge_units(trash_dir, PURGE_SPLIT_DEPTH))
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for done, error in enumerate(executor.map(_purge_unit, units), 1):
+            if error:
+                errors.append(error)
+            if show_progress and (done % 100 == 0 or done == len(units)):
+                print(f"\r  Czyszczenie kosza: {done}/{len(units)}", end="", flush=True)
+    if show_progress and units:
+        print()
+    
+    # Pozostały już tylko puste katalogi (chyba że wystąpiły błędy)
+    if not errors:
+        try:
+            shutil.rmtree(trash_dir)
+        except OSError as e:
+            errors.append(f"{trash_dir}: {e}")
+    return errors
+
+def purge_trash_in_background(root_path):
+    """Uruchamia czyszczenie kosza w odłączonym procesie i wraca natychmiast"""
+    command = [sys.executable, os.path.abspath(__file__), os.fspath(root_path), "--purge-trash", "--quiet"]
+    kwargs = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    return subprocess.Popen(command, **kwargs).pid
+
+def _item_usage(item_path, seen, executor):
+    """Miejsce zajmowane przez plik lub drzewo katalogu elementu venv"""
+    size = _count_usage(item_path.lstat(), seen)
+    if item_path.is_dir() and not item_path.is_symlink():
+        size += get_folder_size(item_path, seen, executor)
+        timings.count(nbytes=size)
+    else:
+        timings.count(files=1, nbytes=size)
+    return size
+
+def remove_venv_contents(venv_folder, dry_run=True, seen=None, executor=None, trash_dir=None,
+                         measure=True):
+    """Usuwa tylko zawartość venv, zachowując inne pliki użytkownika
+    
+    Z trash_dir elementy są tylko przenoszone do kosza (purge_trash usuwa je
+    później), bez niego usuwane są od razu. Rozmiar elementu przeniesionego
+    do kosza liczony jest już w koszu, więc rename nie czeka na przejście
+    drzewa. Z measure=False rozmiar nie jest liczony (zwracane jest 0).
+    """
+    folder = Path(venv_folder)
+    if seen is None:
+        seen = set()
     
     # Wszystkie możliwe elementy venv
-    venv_items = set(windows_venv_items + linux_venv_items)
+    venv_items = set(WINDOWS_VENV_ITEMS + LINUX_VENV_ITEMS)
     
     removed_size = 0
     items_removed = []
@@ -71,41 +463,94 @@ def remove_venv_contents(venv_folder, dry_run=True):
         item_path = folder / item_name
         if item_path.exists():
             try:
-                if item_path.is_file():
-                    size = item_path.stat().st_size
-                    if not dry_run:
-                        item_path.unlink()
-                    removed_size += size
-                    items_removed.append(f"  - plik: {item_name}")
-                elif item_path.is_dir():
-                    size = get_folder_size(item_path)
-                    if not dry_run:
-                        shutil.rmtree(item_path)
-                    removed_size += size
-                    items_removed.append(f"  - folder: {item_name}")
+                kind = "plik" if item_path.is_file() else "folder"
+                size_path = item_path
+                if not dry_run and trash_dir:
+                    with timings.phase('delete'):
+                        size_path = move_to_trash(item_path, trash_dir) or item_path
+                if measure:
+                    with timings.phase('size'):
+                        size = _item_usage(size_path, seen, executor)
+                else:
+                    size = 0
+                if not dry_run and size_path == item_path:
+                    # Bez kosza (albo kosz na innym systemie plików) - usuwamy od razu
+                    with timings.phase('delete'):
+                        _delete_path(item_path)
+                removed_size += size
+                items_removed.append(f"  - {kind}: {item_name}")
             except Exception as e:
                 print(f"  ✗ BŁĄD przy usuwaniu {item_name}: {e}")
     
     return removed_size, items_removed
 
-def find_and_remove_venvs(root_path, dry_run=True):
-    """Znajduje i usuwa zawartość folderów venv"""
+def find_and_remove_venvs(root_path, dry_run=True, background=False, use_cache=False,
+                          free_bytes=None):
+    """Znajduje i usuwa zawartość folderów venv
+    
+    Przy usuwaniu zawartość venv jest najpierw przenoszona do kosza
+    w root_path, a następnie kosz czyszczony jest równolegle - na miejscu
+    albo (background=True) w odłączonym procesie. Z use_cache skan korzysta
+    z indeksu ScanCache zapisanego w root_path.
+    
+    Z free_bytes przetwarzane są tylko najdawniej używane venv, dopóki suma
+    ich rozmiarów nie osiągnie free_bytes. Rozmiary liczone są leniwie,
+    w kolejności rankingu.
+    """
     root = Path(root_path)
+    trash_dir = root / TRASH_DIR_NAME
+    scan_cache = ScanCache(root / CACHE_FILE_NAME) if use_cache else None
     total_size_freed = 0
     venvs_found = []
     
     print(f"Przeszukuję katalog: {root}")
     print(f"Tryb: {'DRY RUN (tylko podgląd)' if dry_run else 'USUWANIE ZAWARTOŚCI VENV'}")
+    if free_bytes is not None:
+        print(f"Cel: zwolnienie {format_size(free_bytes)} (najdawniej używane venv)")
     print("-" * 50)
     
-    for folder_path in root.rglob("*"):
-        if folder_path.is_dir() and is_venv_folder(folder_path):
+    # Wspólny zbiór inode'ów: pliki współdzielone przez kilka venv (np. cache uv)
+    # liczone są tylko raz w całym raporcie
+    seen = set()
+    with ThreadPoolExecutor(max_workers=SIZE_WORKERS) as executor:
+        # Skan jest konsumowany na bieżąco - iter_phase mierzy tylko jego część
+        venv_folders = timings.iter_phase('scan', iter_venv_folders(root, scan_cache))
+        if free_bytes is None:
+            candidates = ((folder_path, None) for folder_path in venv_folders)
+        else:
+            with timings.phase('rank'):
+                candidates = rank_venvs_by_staleness(venv_folders, scan_cache)
+        
+        venvs_skipped = 0
+        for folder_path, last_used in candidates:
+            if free_bytes is not None and total_size_freed >= free_bytes:
+                # Cel osiągnięty - pozostałych venv nawet nie mierzymy
+                venvs_skipped += 1
+                if scan_cache is not None:
+                    scan_cache.keep_venv(folder_path)
+                continue
+            
             venvs_found.append(folder_path)
             
             print(f"Znaleziono venv: {folder_path}")
+            if last_used is not None:
+                print(f"  Ostatnio używany: {datetime.fromtimestamp(last_used):%Y-%m-%d}")
+            
+            cached = scan_cache.lookup_venv(folder_path) if scan_cache is not None else None
+            if cached is not None and dry_run:
+                size_freed, items_removed = cached
+            else:
+                # Usuń tylko zawartość venv, nie cały folder
+                size_freed, items_removed = remove_venv_contents(
+                    folder_path, dry_run, seen, executor, trash_dir, measure=cached is None)
+                if cached is not None:
+                    size_freed = cached[0]
             
-            # Usuń tylko zawartość venv, nie cały folder
-            size_freed, items_removed = remove_venv_contents(folder_path, dry_run)
+            if scan_cache is not None:
+                if not dry_run:
+                    scan_cache.forget_venv(folder_path)
+                elif cached is None:
+                    scan_cache.store_venv(folder_path, size_freed, items_removed)
             total_size_freed += size_freed
             
             print(f"  Rozmiar do zwolnienia: {format_size(size_freed)}")
@@ -127,7 +572,16 @@ def find_and_remove_venvs(root_path, dry_run=True):
             print()
     
     print("-" * 50)
-    print(f"Znaleziono {len(venvs_found)} folderów venv")
+    if scan_cache is not None:
+        scan_cache.save()
+        print(f"Cache: przeskanowano {scan_cache.stats['dirs_scanned']} katalogów, "
+              f"pominięto {scan_cache.stats['dirs_reused']} niezmienionych, "
+              f"rozmiary z cache: {scan_cache.stats['sizes_reused']}")
+    print(f"Znaleziono {len(venvs_found) + venvs_skipped} folderów venv")
+    if free_bytes is not None:
+        print(f"Wybrano {len(venvs_found)} najdawniej używanych")
+        if total_size_freed < free_bytes:
+            print(f"UWAGA: nie udało się osiągnąć celu {format_size(free_bytes)}")
     print(f"Całkowity rozmiar do zwolnienia: {format_size(total_size_freed)}")
     
     if dry_run and venvs_found:
@@ -135,25 +589,59 @@ def find_and_remove_venvs(root_path, dry_run=True):
         print("UWAGA: Usuwana będzie tylko zawartość venv (Include, Lib, Scripts, bin, lib itp.)")
         print("Inne pliki w folderach pozostaną nietknięte!")
     elif not dry_run:
+        if background:
+            pid = purge_trash_in_background(root)
+            print(f"Kosz {trash_dir} jest czyszczony w tle (PID {pid})")
+        else:
+            report_purge(trash_dir)
         print("Operacja zakończona!")
 
+def report_purge(trash_dir, show_progress=True):
+    """Czyści kosz i wypisuje ewentualne błędy"""
+    with timings.phase('purge'):
+        errors = purge_trash(trash_dir, show_progress=show_progress)
+    for error in errors:
+        print(f"  ✗ BŁĄD przy usuwaniu {error}")
+    if errors:
+        print(f"Nie wszystko udało się usunąć - pozostałości są w {trash_dir}")
+        print("Uruchom ponownie z parametrem --purge-trash, aby dokończyć")
+
 def main():
     parser = argparse.ArgumentParser(description="Usuwa foldery venv z projektów Python")
     parser.add_argument("path", help="Ścieżka do katalogu głównego")
     parser.add_argument("--delete", action="store_true", 
                        help="Rzeczywiście usuń (domyślnie tylko podgląd)")
+    parser.add_argument("--background", action="store_true",
+                       help="Czyść kosz w tle, w odłączonym procesie (z --delete)")
+    parser.add_argument("--purge-trash", action="store_true",
+                       help=f"Tylko dokończ czyszczenie kosza {TRASH_DIR_NAME}")
+    parser.add_argument("--cache", action="store_true",
+                       help=f"Używaj indeksu skanowania {CACHE_FILE_NAME} (szybsze kolejne skany)")
+    parser.add_argument("--free", type=parse_size, metavar="ROZMIAR",
+                       help="Zwolnij tylko tyle miejsca (np. 50GB), zaczynając od najdawniej używanych venv "
+                            "(z --cache: w obrębie dnia najpierw większe)")
+    parser.add_argument("--quiet", action="store_true",
+                       help=argparse.SUPPRESS)
+    timings.add_arguments(parser)
     
     args = parser.parse_args()
-    
-    if not os.path.exists(args.path):
-        print(f"Błąd: Ścieżka {args.path} nie istnieje!")
-        return
-    
-    if not args.delete:
-        print("UWAGA: Tryb podglądu. Dodaj --delete aby rzeczywiście usunąć.")
-        print()
-    
-    find_and_remove_venvs(args.path, dry_run=not args.delete)
+    if args.background and not args.delete:
+        parser.error("--background wymaga --delete")
+    with timings.session(args):
+        if not os.path.exists(args.path):
+            print(f"Błąd: Ścieżka {args.path} nie istnieje!")
+            return
+        
+        if args.purge_trash:
+            report_purge(Path(args.path) / TRASH_DIR_NAME, show_progress=not args.quiet)
+            return
+        
+        if not args.delete:
+            print("UWAGA: Tryb podglądu. Dodaj --delete aby rzeczywiście usunąć.")
+            print()
+        
+        find_and_remove_venvs(args.path, dry_run=not args.delete, background=args.background,
+                              use_cache=args.cache, free_bytes=args.free)
 
 if __name__ == "__main__":
     main()
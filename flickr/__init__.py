@@ -0,0 +1 @@
+"""Pobieranie albumów Flickr i deduplikacja list photo_urls.txt"""
@@ -3,7 +3,8 @@
 Dedup Photo URLs - Usuwa powielone wiersze z plików photo_urls.txt
 
 Użycie:
-    python dedup_photo_urls.py [folder_z_plikami]
+    utils dedup [folder_z_plikami]
+    python -m flickr.dedup_photo_urls [folder_z_plikami]  (z katalogu repozytorium)
 
 Jeśli nie podano folderu, skrypt przeszuka wszystkie podfoldery w bieżącym katalogu
 i znajdzie pliki photo_urls.txt.
@@ -15,10 +16,12 @@ Skrypt:
 """
 
 import os
-import sys
-import glob
+import argparse
 from collections import defaultdict
 
+import timings
+from fswalk import iter_files
+
 
 def deduplicate_photo_urls_file(filepath):
     """
@@ -82,9 +85,10 @@ def find_photo_urls_files(search_path):
         if os.path.basename(search_path) == 'photo_urls.txt':
             files_found.append(search_path)
     elif os.path.isdir(search_path):
-        # Przeszukaj katalog rekursywnie
-        pattern = os.path.join(search_path, '**', 'photo_urls.txt')
-        files_found = glob.glob(pattern, recursive=True)
+        # Przeszukaj katalog rekursywnie (jak glob - bez ukrytych katalogów)
+        files_found = [entry.path for _, entry in iter_files(
+            search_path, lambda name: name == 'photo_urls.txt',
+            prune=lambda entry: entry.name.startswith('.'))]
     else:
         print(f"❌ Ścieżka nie istnieje: {search_path}")
         return []
@@ -93,21 +97,27 @@ def find_photo_urls_files(search_path):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Usuwa powielone wiersze z plików photo_urls.txt")
+    parser.add_argument("search_path", nargs='?', default=".",
+                        help="Plik photo_urls.txt lub katalog do przeszukania (domyślnie bieżący)")
+    timings.add_arguments(parser)
+    args = parser.parse_args()
+
+    with timings.session(args):
+        run(args.search_path)
+
+
+def run(search_path):
     print("=" * 60)
     print("DEDUPLIKATOR PLIKÓW PHOTO_URLS.TXT")
     print("=" * 60)
 
-    # Określ ścieżkę do przeszukania
-    if len(sys.argv) > 1:
-        search_path = sys.argv[1]
-    else:
-        search_path = "."  # bieżący katalog
-
     print(f"Szukanie plików w: {os.path.abspath(search_path)}")
     print()
 
     # Znajdź pliki
-    photo_urls_files = find_photo_urls_files(search_path)
+    with timings.phase('scan'):
+        photo_urls_files = find_photo_urls_files(search_path)
 
     if not photo_urls_files:
         print("❌ Nie znaleziono żadnych plików photo_urls.txt")
@@ -124,7 +134,9 @@ def main():
 
     for filepath in photo_urls_files:
         try:
-            duplicates = deduplicate_photo_urls_file(filepath)
+            with timings.phase('dedup'):
+                duplicates = deduplicate_photo_urls_file(filepath)
+                timings.count(files=1, nbytes=os.path.getsize(filepath))
             total_duplicates += duplicates
             processed_files += 1
             print()
@@ -29,18 +29,14 @@ Uruchom program ponownie, aby kontynuować przerwane pobieranie!
 
 import os
 import time
-import requests
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 import re
 import threading
 from queue import Queue
-from tqdm import tqdm
+
+import timings
+
+# selenium, requests i tqdm są importowane w metodach, które ich używają -
+# sam import selenium trwa dłużej niż np. wyświetlenie --help
 
 class FlickrAlbumDownloader:
     def __init__(self, album_url, download_folder="flickr_photos"):
@@ -134,6 +130,9 @@ class FlickrAlbumDownloader:
     
     def setup_driver(self):
         """Konfiguracja Selenium WebDriver"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
         chrome_options = Options()
         chrome_options.add_argument('--headless')  # Usuń tę linię jeśli chcesz widzieć przeglądarkę
         chrome_options.add_argument('--no-sandbox')
@@ -146,6 +145,8 @@ class FlickrAlbumDownloader:
     
     def get_total_photos_count(self):
         """Pobierz całkowitą liczbę zdjęć z albumu ze strony"""
+        from selenium.webdriver.common.by import By
+
         try:
             # Szukaj elementu z liczbą zdjęć: <span class="stat photo-count">257 photos</span>
             count_element = self.driver.find_element(By.CSS_SELECTOR, ".stat.photo-count")
@@ -170,6 +171,8 @@ class FlickrAlbumDownloader:
     
     def get_total_pages(self):
         """Wykryj całkowitą liczbę stron w albumie"""
+        from selenium.webdriver.common.by import By
+
         max_page = 1
         
         try:
@@ -244,6 +247,8 @@ class FlickrAlbumDownloader:
     
     def scroll_to_load_all_on_page(self):
         """Przewiń stronę, aby załadować wszystkie zdjęcia na bieżącej stronie"""
+        from selenium.webdriver.common.by import By
+
         last_height = self.driver.execute_script("return document.body.scrollHeight")
         photos_loaded = 0
         stagnant_count = 0
@@ -280,6 +285,8 @@ class FlickrAlbumDownloader:
         2. Jeśli nie istnieje, Flickr przekieruje na /sizes/o/ lub najwyższą dostępną
         3. Pobiera URL obrazka z img src (zawiera prawidłowy secret dla tego zdjęcia)
         """
+        from selenium.webdriver.common.by import By
+
         try:
             # Wykryj użytkownika i ID zdjęcia z URL
             match = re.search(r'/photos/([^/]+)/(\d+)', photo_page_url)
@@ -368,6 +375,8 @@ class FlickrAlbumDownloader:
     
     def extract_photo_urls_from_page(self):
         """Wyciągnij wszystkie URL-e zdjęć z bieżącej strony wraz z nazwami"""
+        from selenium.webdriver.common.by import By
+
         # Znajdź wszystkie karty zdjęć
         photo_cards = self.driver.find_elements(By.CSS_SELECTOR, ".photo-card")
         
@@ -483,6 +492,8 @@ class FlickrAlbumDownloader:
     
     def download_worker(self):
         """Wątek pobierający zdjęcia z kolejki"""
+        import requests
+
         while True:
             item = self.download_queue.get()
             if item is None:  # Sygnał zakończenia
@@ -507,11 +518,14 @@ class FlickrAlbumDownloader:
                 # Czekaj na wznowienie jeśli jest rate limit
                 self.rate_limit_event.wait()
                 
+                started = time.perf_counter()
                 response = requests.get(url, timeout=30)
                 if response.status_code == 200:
                     filepath = os.path.join(self.download_folder, filename)
                     with open(filepath, 'wb') as f:
                         f.write(response.content)
+                    timings.record('download', time.perf_counter() - started,
+                                   files=1, nbytes=len(response.content))
                     
                     # Sprawdź czy plik nie jest zbyt mały (prawdopodobnie błąd)
                     if os.path.getsize(filepath) < 1024:
@@ -566,24 +580,30 @@ class FlickrAlbumDownloader:
     
     def process_all_pages(self):
         """Przejdź przez wszystkie strony albumu i zbierz URL-e zdjęć"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+        from tqdm import tqdm
+
         print("Wykrywanie liczby stron...")
         
-        # Załaduj pierwszą stronę
-        self.driver.get(self.album_url)
-        
-        # Poczekaj na załadowanie
-        WebDriverWait(self.driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "img[src*='staticflickr.com']"))
-        )
-        
-        # Pobierz całkowitą liczbę zdjęć w albumie
-        self.total_photos = self.get_total_photos_count()
-        if self.total_photos > 0:
-            print(f"📊 Wykryto {self.total_photos} zdjęć w albumie")
-        
-        # Wykryj całkowitą liczbę stron
-        total_pages = self.get_total_pages()
-        print(f"✓ Wykryto {total_pages} stron")
+        with timings.phase('scan'):
+            # Załaduj pierwszą stronę
+            self.driver.get(self.album_url)
+            
+            # Poczekaj na załadowanie
+            WebDriverWait(self.driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "img[src*='staticflickr.com']"))
+            )
+            
+            # Pobierz całkowitą liczbę zdjęć w albumie
+            self.total_photos = self.get_total_photos_count()
+            if self.total_photos > 0:
+                print(f"📊 Wykryto {self.total_photos} zdjęć w albumie")
+            
+            # Wykryj całkowitą liczbę stron
+            total_pages = self.get_total_pages()
+            print(f"✓ Wykryto {total_pages} stron")
         
         # Utwórz progressbar dla pobierania
         print()  # Nowa linia przed progressbarem
@@ -612,27 +632,31 @@ class FlickrAlbumDownloader:
             else:
                 page_url = f"{self.album_url}/page{page_num}"
             
-            self.driver.get(page_url)
-            
-            # Poczekaj na załadowanie zdjęć
-            try:
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "img[src*='staticflickr.com']"))
-                )
-            except:
-                continue
-            
-            # Przewiń aby załadować wszystkie zdjęcia na tej stronie
-            self.scroll_to_load_all_on_page()
+            with timings.phase('scan'):
+                self.driver.get(page_url)
+                
+                # Poczekaj na załadowanie zdjęć
+                try:
+                    WebDriverWait(self.driver, 10).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "img[src*='staticflickr.com']"))
+                    )
+                except:
+                    continue
+                
+                # Przewiń aby załadować wszystkie zdjęcia na tej stronie
+                self.scroll_to_load_all_on_page()
             
             # Wyciągnij URL-e z tej strony i NATYCHMIAST dodaj do kolejki pobierania
-            self.extract_photo_urls_from_page()
+            with timings.phase('resolve'):
+                self.extract_photo_urls_from_page()
             
             # Krótka pauza między stronami
             time.sleep(0.5)
         
-        # Poczekaj na zakończenie wszystkich pobierań
-        self.download_queue.join()
+        # Poczekaj na zakończenie wszystkich pobierań (same pobrania liczone
+        # są w wątkach jako faza 'download')
+        with timings.phase('download-wait'):
+            self.download_queue.join()
         
         # Zamknij progressbar
         if self.download_pbar:
@@ -648,6 +672,8 @@ class FlickrAlbumDownloader:
     
     def download_photo(self, url, filename):
         """Pobierz pojedyncze zdjęcie"""
+        import requests
+
         try:
             response = requests.get(url, timeout=30)
             if response.status_code == 200:
@@ -687,7 +713,8 @@ class FlickrAlbumDownloader:
             if self.failed_files:
                 print(f"↻ Ponowne pobieranie: {len(self.failed_files)} wcześniej nieudanych plików\n")
             
-            self.setup_driver()
+            with timings.phase('browser'):
+                self.setup_driver()
             print("✓ Przeglądarka uruchomiona\n")
             
             # Przetwórz wszystkie strony i zbierz URL-e (równocześnie pobierając)
@@ -738,12 +765,28 @@ class FlickrAlbumDownloader:
                 print("\n✓ Przeglądarka zamknięta")
 
 
-if __name__ == "__main__":
-    # Wklej tutaj URL albumu Flickr (bez /page1 na końcu)
-    ALBUM_URL = "https://www.flickr.com/photos/ikmgdansk/albums/72177720330390070/"
-    
-    # Możesz zmienić folder docelowy
-    DOWNLOAD_FOLDER = "MusicJam"
+# Wklej tutaj URL albumu Flickr (bez /page1 na końcu)
+ALBUM_URL = "https://www.flickr.com/photos/ikmgdansk/albums/72177720330390070/"
+
+# Możesz zmienić folder docelowy
+DOWNLOAD_FOLDER = "MusicJam"
+
+
+def main():
+    import argparse
 
-    downloader = FlickrAlbumDownloader(ALBUM_URL, DOWNLOAD_FOLDER)
-    downloader.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Pobiera zdjęcia z albumu Flickr w najwyższej dostępnej rozdzielczości")
+    parser.add_argument("album_url", nargs='?', default=ALBUM_URL,
+                        help="URL albumu Flickr (bez /page1 na końcu)")
+    parser.add_argument("-o", "--folder", default=DOWNLOAD_FOLDER,
+                        help=f"Folder docelowy (domyślnie {DOWNLOAD_FOLDER})")
+    timings.add_arguments(parser)
+    args = parser.parse_args()
+
+    with timings.session(args):
+        downloader = FlickrAlbumDownloader(args.album_url, args.folder)
+        downloader.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""Wspólne przechodzenie drzewa katalogów dla wszystkich narzędzi
+
+walk() to odpowiednik os.walk zwracający wpisy DirEntry: każdy katalog jest
+listowany dokładnie raz przez os.scandir, typ wpisu pochodzi z d_type, a stat
+wpisu jest zapamiętywany w DirEntry i nie wymaga kolejnego wywołania systemowego.
+Obsługuje reguły w stylu .gitignore, pomijane nazwy katalogów, funkcję
+przycinającą oraz równoległe listowanie katalogów w puli wątków.
+"""
+import os
+import re
+
+
+def _gitignore_pattern_to_regex(pattern):
+    """Tłumaczy wzorzec w stylu .gitignore na wyrażenie regularne"""
+    regex = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            regex.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            regex.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            regex.append('[^/]')
+            i += 1
+        elif pattern[i] == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                regex.append(re.escape(pattern[i]))
+                i += 1
+            else:
+                regex.append('[' + pattern[i + 1:end].replace('!', '^', 1) + ']')
+                i = end + 1
+        else:
+            regex.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile(''.join(regex) + '$')
+
+def parse_ignore_patterns(lines, base=''):
+    """Zamienia linie w formacie .gitignore na listę reguł
+
+    base to ścieżka (względem katalogu głównego) katalogu z plikiem .gitignore.
+    Reguła: (base, regex, czy_negacja, tylko_katalogi, czy_zakotwiczona).
+    """
+    rules = []
+    for line in lines:
+        line = line.rstrip('\n').rstrip()
+        if not line or line.startswith('#'):
+            continue
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        # Wzorzec ze "/" w środku lub na początku dotyczy ścieżki, a nie samej nazwy
+        anchored = '/' in line
+        line = line.lstrip('/')
+        if line:
+            rules.append((base, _gitignore_pattern_to_regex(line), negate, dir_only, anchored))
+    return rules
+
+def is_ignored(rel_path, is_dir, rules):
+    """Sprawdza ścieżkę (względną, z "/") względem reguł - wygrywa ostatnia pasująca"""
+    ignored = False
+    name = rel_path.rsplit('/', 1)[-1]
+    for base, regex, negate, dir_only, anchored in rules:
+        if dir_only and not is_dir:
+            continue
+        if anchored:
+            if base:
+                if not rel_path.startswith(base + '/'):
+                    continue
+                target = rel_path[len(base) + 1:]
+            else:
+                target = rel_path
+        else:
+            if base and not rel_path.startswith(base + '/'):
+                continue
+            target = name
+        if regex.match(target):
+            ignored = not negate
+    return ignored
+
+def _read_gitignore(dir_path, base):
+    try:
+        with open(os.path.join(dir_path, '.gitignore'), 'r', encoding='utf-8', errors='replace') as f:
+            return parse_ignore_patterns(f, base)
+    except OSError:
+        return []
+
+def _scan(dir_path, prefetch_stat):
+    """Listuje jeden katalog; zwraca listę DirEntry albo None przy błędzie"""
+    try:
+        with os.scandir(dir_path) as it:
+            entries = list(it)
+    except OSError:
+        return None
+    if prefetch_stat:
+        # DirEntry zapamiętuje wynik - późniejsze entry.stat() nie woła systemu
+        for entry in entries:
+            try:
+                entry.stat(follow_symlinks=False)
+            except OSError:
+                pass
+    return entries
+
+class _Walker:
+    """Stan jednego przejścia: filtrowanie wpisów katalogu i reguły ignorowania"""
+    __slots__ = ('skip_dirs', 'prune', 'gitignore', 'extra_rules', 'follow_symlinks')
+
+    def __init__(self, skip_dirs, prune, gitignore, ignore_patterns, follow_symlinks):
+        self.skip_dirs = {name.lower() for name in skip_dirs}
+        self.prune = prune
+        self.gitignore = gitignore
+        # Wzorce przekazane jawnie są sprawdzane na końcu, więc mają pierwszeństwo
+        self.extra_rules = parse_ignore_patterns(ignore_patterns)
+        self.follow_symlinks = follow_symlinks
+
+    def split(self, dir_path, rel_dir, entries, gitignore_rules):
+        """Dzieli wpisy na (reguły .gitignore dla podkatalogów, katalogi, pliki)"""
+        if self.gitignore and any(entry.name == '.gitignore' for entry in entries):
+            gitignore_rules = gitignore_rules + _read_gitignore(dir_path, rel_dir)
+        rules = gitignore_rules + self.extra_rules if gitignore_rules else self.extra_rules
+
+        dirs = []
+        files = []
+        for entry in entries:
+            try:
+                # Jak w os.walk: dowiązanie do katalogu trafia do dirs
+                is_dir = entry.is_dir()
+                # FIFO, gniazda, urządzenia i zerwane dowiązania nie są plikami
+                is_file = not is_dir and entry.is_file()
+            except OSError:
+                is_dir = is_file = False
+            if rules:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                if is_ignored(rel_path, is_dir, rules):
+                    continue
+            if is_dir:
+                if entry.name.lower() in self.skip_dirs:
+                    continue
+                if self.prune is not None and self.prune(entry):
+                    continue
+                dirs.append(entry)
+            elif is_file:
+                files.append(entry)
+        return gitignore_rules, dirs, files
+
+    def children(self, rel_dir, dirs, gitignore_rules):
+        """Katalogi do odwiedzenia: (ścieżka, ścieżka względna, reguły .gitignore)"""
+        for entry in dirs:
+            if self.follow_symlinks or not entry.is_symlink():
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                yield entry.path, rel_path, gitignore_rules
+
+def walk(root, recursive=True, skip_dirs=(), prune=None, gitignore=False, ignore_patterns=(),
+         follow_symlinks=False, prefetch_stat=False, workers=1, executor=None):
+    """Generator (katalog, ścieżka względna, podkatalogi, pliki) - os.walk na DirEntry
+
+    Ścieżka względna używa "/" ('' dla root). Podkatalogi i pliki to listy
+    DirEntry po odfiltrowaniu; usunięcie wpisu z podkatalogów (jak w os.walk)
+    sprawia, że walker do niego nie wejdzie. Plikami są tylko zwykłe pliki
+    (także przez dowiązanie) - FIFO, gniazda i urządzenia są pomijane.
+
+    skip_dirs - nazwy katalogów pomijanych (bez wielkości liter)
+    prune(entry) - zwraca True dla katalogu, który należy pominąć
+    gitignore - czy stosować pliki .gitignore napotkane po drodze
+    ignore_patterns - dodatkowe wzorce w formacie .gitignore
+    prefetch_stat - lstat wpisów wykonywany już przy listowaniu (w wątku puli)
+
+    Z workers > 1 albo przekazanym executor (ThreadPoolExecutor) katalogi
+    są listowane równolegle, a kolejność katalogów jest dowolna. Katalogi
+    nieczytelne są pomijane.
+    """
+    walker = _Walker(skip_dirs, prune, gitignore, ignore_patterns, follow_symlinks)
+    root = os.fspath(root)
+
+    if executor is None and workers > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            yield from _walk_parallel(walker, root, recursive, prefetch_stat, executor)
+        finally:
+            executor.shutdown(cancel_futures=True)
+        return
+    if executor is not None:
+        yield from _walk_parallel(walker, root, recursive, prefetch_stat, executor)
+        return
+
+    stack = [(root, '', [])]
+    while stack:
+        dir_path, rel_dir, gitignore_rules = stack.pop()
+        entries = _scan(dir_path, prefetch_stat)
+        if entries is None:
+            continue
+        gitignore_rules, dirs, files = walker.split(dir_path, rel_dir, entries, gitignore_rules)
+        yield dir_path, rel_dir, dirs, files
+        if recursive:
+            # Odwrócona kolejność na stosie = katalogi w kolejności listowania
+            stack.extend(reversed(list(walker.children(rel_dir, dirs, gitignore_rules))))
+
+def _walk_parallel(walker, root, recursive, prefetch_stat, executor):
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    pending = {executor.submit(_scan, root, prefetch_stat): (root, '', [])}
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            dir_path, rel_dir, gitignore_rules = pending.pop(future)
+            entries = future.result()
+            if entries is None:
+                continue
+            gitignore_rules, dirs, files = walker.split(dir_path, rel_dir, entries, gitignore_rules)
+            yield dir_path, rel_dir, dirs, files
+            if recursive:
+                for child in walker.children(rel_dir, dirs, gitignore_rules):
+                    pending[executor.submit(_scan, child[0], prefetch_stat)] = child
+
+def iter_files(root, match=None, **options):
+    """Generator (ścieżka względna, DirEntry) plików drzewa
+
+    match(nazwa) wybiera pliki; pozostałe argumenty jak w walk().
+    """
+    for _, rel_dir, _, files in walk(root, **options):
+        for entry in files:
+            if match is None or match(entry.name):
+                yield (f"{rel_dir}/{entry.name}" if rel_dir else entry.name), entry
@@ -0,0 +1 @@
+"""Narzędzia GPX: binarny cache tracków, indeks, upraszczanie, zmiana nazw"""
@@ -0,0 +1,174 @@
+import os
+import sys
+import xml.etree.ElementTree as ET
+from array import array
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+import timings
+
+# Kolumny w pliku cache (tablica o kształcie (5, N), każda kolumna ciągła w pamięci)
+LAT, LON, ELE, TIME, SEG = range(5)
+COLUMNS = ('lat', 'lon', 'ele', 'time', 'seg')
+
+CACHE_DIR_NAME = '.gpxcache'
+
+
+def _local_name(tag):
+    """Zwraca nazwę tagu bez namespace (GPX 1.0 i 1.1 mają różne)"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _parse_time(time_str):
+    """Zamienia czas ISO 8601 z GPX na epoch (sekundy, float)"""
+    return datetime.fromisoformat(time_str.strip().replace('Z', '+00:00')).timestamp()
+
+
+def cache_path_for(gpx_path):
+    """Zwraca ścieżkę pliku cache dla danego pliku GPX"""
+    gpx_path = Path(gpx_path)
+    return gpx_path.parent / CACHE_DIR_NAME / (gpx_path.name + '.npy')
+
+
+def parse_gpx_track(gpx_path):
+    """Parsuje plik GPX strumieniowo i zwraca tablicę kolumnową (5, N)
+
+    Używa iterparse i czyści przetworzone elementy, więc drzewo XML
+    nigdy nie jest trzymane w całości w pamięci.
+    """
+    columns = [array('d') for _ in COLUMNS]
+    segment = -1
+    point = None
+
+    for event, elem in ET.iterparse(gpx_path, events=('start', 'end')):
+        name = _local_name(elem.tag)
+
+        if event == 'start':
+            if name == 'trkseg':
+                segment += 1
+            elif name == 'trkpt':
+                point = [float(elem.get('lat')), float(elem.get('lon')), np.nan, np.nan]
+            continue
+
+        if point is not None:
+            if name == 'ele' and elem.text:
+                point[ELE] = float(elem.text)
+            elif name == 'time' and elem.text:
+                point[TIME] = _parse_time(elem.text)
+            elif name == 'trkpt':
+                for column, value in zip(columns, point):
+                    column.append(value)
+                columns[SEG].append(max(segment, 0))
+                point = None
+                elem.clear()
+
+    return np.vstack([np.frombuffer(column, dtype=np.float64) for column in columns])
+
+
+def is_cache_fresh(gpx_path, cache_path=None):
+    """Sprawdza czy cache istnieje i ma ten sam mtime co plik źródłowy"""
+    cache_path = Path(cache_path) if cache_path else cache_path_for(gpx_path)
+    try:
+        return cache_path.stat().st_mtime_ns == os.stat(gpx_path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def build_cache(gpx_path, force=False):
+    """Tworzy (lub odświeża) plik cache dla pliku GPX
+
+    Zwraca True jeśli cache został zapisany, False jeśli był aktualny.
+    """
+    cache_path = cache_path_for(gpx_path)
+    if not force and is_cache_fresh(gpx_path, cache_path):
+        return False
+
+    source_stat = os.stat(gpx_path)
+    data = parse_gpx_track(gpx_path)
+
+    cache_path.parent.mkdir(exist_ok=True)
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.ascontiguousarray(data))
+    # mtime cache = mtime źródła, dzięki temu walidacja to jedno porównanie
+    os.utime(tmp_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+    os.replace(tmp_path, cache_path)
+    return True
+
+
+def load_track(gpx_path, rebuild=True):
+    """Ładuje track z cache jako tablicę mapowaną w pamięci (bez kopiowania)
+
+    Jeśli cache jest nieaktualny, zostaje przebudowany (chyba że rebuild=False,
+    wtedy plik GPX jest parsowany bez zapisywania cache).
+    """
+    cache_path = cache_path_for(gpx_path)
+    if not is_cache_fresh(gpx_path, cache_path):
+        if not rebuild:
+            return parse_gpx_track(gpx_path)
+        build_cache(gpx_path, force=True)
+    return np.load(cache_path, mmap_mode='r')
+
+
+def iter_segments(track):
+    """Dzieli tablicę tracka na widoki (bez kopiowania) dla kolejnych segmentów"""
+    if track.shape[1] == 0:
+        return
+    seg = track[SEG]
+    boundaries = np.flatnonzero(seg[1:] != seg[:-1]) + 1
+    start = 0
+    for end in list(boundaries) + [track.shape[1]]:
+        yield track[:, start:end]
+        start = end
+
+
+def build_cache_for_directory(directory='.', force=False):
+    """Tworzy cache dla wszystkich plików GPX w katalogu"""
+    directory = Path(directory)
+
+    print(f"Przeszukuję katalog: {directory}")
+    print("-" * 60)
+
+    built = fresh = failed = 0
+    with timings.phase('scan'):
+        gpx_files = sorted(directory.glob('*.gpx'))
+    with timings.phase('build'):
+        for file_path in gpx_files:
+            try:
+                if build_cache(file_path, force=force):
+                    built += 1
+                    timings.count(files=1)
+                    print(f"💾 {file_path.name}")
+                else:
+                    fresh += 1
+            except Exception as e:
+                failed += 1
+                print(f"❌ Błąd przy parsowaniu {file_path.name}: {e}")
+
+    print("-" * 60)
+    print(f"Zapisano cache: {built}, aktualne: {fresh}, błędy: {failed}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tworzy binarny, kolumnowy cache dla plików GPX")
+    parser.add_argument("directory", nargs='?', default='.',
+                       help="Katalog z plikami GPX (domyślnie bieżący)")
+    parser.add_argument("--force", action="store_true",
+                       help="Przebuduj cache nawet jeśli jest aktualny")
+    timings.add_arguments(parser)
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.directory):
+        print(f"Błąd: Katalog {args.directory} nie istnieje!")
+        sys.exit(1)
+
+    with timings.session(args):
+        build_cache_for_directory(args.directory, force=args.force)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import os
+import sys
+import sqlite3
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+import timings
+from fswalk import iter_files
+from .gpx_cache import CACHE_DIR_NAME, LAT, LON, TIME, iter_segments, load_track
+from .rename_gpx_by_date import extract_date_from_gpx, format_date_polish
+
+INDEX_FILE_NAME = '.gpxindex.sqlite'
+
+# Identyfikator segmentu w R-tree = (id tracka << SEGMENT_BITS) | numer segmentu
+SEGMENT_BITS = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    start_time REAL,
+    end_time REAL,
+    segment_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tracks_start_time ON tracks(start_time);
+CREATE INDEX IF NOT EXISTS tracks_end_time ON tracks(end_time);
+CREATE VIRTUAL TABLE IF NOT EXISTS segment_bbox USING rtree(
+    id, min_lat, max_lat, min_lon, max_lon, +track_id INTEGER
+);
+"""
+
+
+def open_index(db_path):
+    """Otwiera (i w razie potrzeby tworzy) bazę indeksu"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _track_time_range(track, gpx_path):
+    """Zwraca (start, koniec) tracka jako epoch lub (None, None)"""
+    times = track[TIME]
+    if times.size and not np.isnan(times).all():
+        return float(np.nanmin(times)), float(np.nanmax(times))
+
+    # Brak czasów w punktach - spróbuj tak jak przy zmianie nazw plików
+    date_obj = extract_date_from_gpx(gpx_path)
+    if date_obj is None:
+        return None, None
+    start = datetime.combine(date_obj, dt_time.min, tzinfo=timezone.utc).timestamp()
+    return start, start + 86400 - 1
+
+
+def _remove_track(conn, track_id, segment_count):
+    for seg_index in range(segment_count):
+        conn.execute("DELETE FROM segment_bbox WHERE id = ?",
+                     ((track_id << SEGMENT_BITS) | seg_index,))
+    conn.execute("DELETE FROM tracks WHERE id = ?", (track_id,))
+
+
+def index_track(conn, gpx_path, force=False):
+    """Dodaje lub aktualizuje jeden track w indeksie
+
+    Zwraca True jeśli track został (prze)indeksowany, False jeśli był aktualny.
+    """
+    gpx_path = Path(gpx_path).resolve()
+    stat = gpx_path.stat()
+
+    row = conn.execute("SELECT id, mtime_ns, size, segment_count FROM tracks WHERE path = ?",
+                       (str(gpx_path),)).fetchone()
+    if row is not None:
+        track_id, mtime_ns, size, segment_count = row
+        if not force and mtime_ns == stat.st_mtime_ns and size == stat.st_size:
+            return False
+        _remove_track(conn, track_id, segment_count)
+
+    track = load_track(gpx_path)
+    start_time, end_time = _track_time_range(track, gpx_path)
+
+    bboxes = []
+    for segment in iter_segments(track):
+        lat, lon = segment[LAT], segment[LON]
+        bboxes.append((float(lat.min()), float(lat.max()), float(lon.min()), float(lon.max())))
+
+    if len(bboxes) >= 1 << SEGMENT_BITS:
+        raise ValueError(f"Za dużo segmentów: {len(bboxes)}")
+
+    cursor = conn.execute(
+        "INSERT INTO tracks (path, mtime_ns, size, start_time, end_time, segment_count) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (str(gpx_path), stat.st_mtime_ns, stat.st_size, start_time, end_time, len(bboxes)))
+    track_id = cursor.lastrowid
+
+    conn.executemany(
+        "INSERT INTO segment_bbox (id, min_lat, max_lat, min_lon, max_lon, track_id) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [((track_id << SEGMENT_BITS) | i, *bbox, track_id) for i, bbox in enumerate(bboxes)])
+    return True
+
+
+def update_index(conn, directory, force=False):
+    """Synchronizuje indeks z katalogiem: dodaje nowe/zmienione, usuwa skasowane tracki"""
+    directory = Path(directory).resolve()
+
+    with timings.phase('scan'):
+        gpx_files = [Path(entry.path) for _, entry in iter_files(directory, lambda name: name.endswith('.gpx'),
+                                                                 prune=lambda entry: entry.name == CACHE_DIR_NAME)]
+    present = {str(p) for p in gpx_files}
+
+    added = unchanged = failed = 0
+    with conn:
+        with timings.phase('index'):
+            for file_path in sorted(gpx_files):
+                try:
+                    if index_track(conn, file_path, force=force):
+                        added += 1
+                        timings.count(files=1)
+                        print(f"📍 {file_path.relative_to(directory)}")
+                    else:
+                        unchanged += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"❌ Błąd przy indeksowaniu {file_path.name}: {e}")
+
+        removed = 0
+        prefix = str(directory) + os.sep
+        rows = conn.execute("SELECT id, path, segment_count FROM tracks WHERE path LIKE ? ESCAPE '\\'",
+                            (prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%',))
+        for track_id, path, segment_count in rows.fetchall():
+            if path not in present:
+                _remove_track(conn, track_id, segment_count)
+                removed += 1
+
+    return added, unchanged, removed, failed
+
+
+def query_tracks(conn, bbox=None, date_from=None, date_to=None):
+    """Zwraca listę (ścieżka, start, koniec) tracków przecinających bbox i zakres dat
+
+    bbox to (min_lat, min_lon, max_lat, max_lon). Zakres dat jest włączny.
+    """
+    conditions = []
+    params = []
+
+    if date_from is not None:
+        from_ts = datetime.combine(date_from, dt_time.min, tzinfo=timezone.utc).timestamp()
+        conditions.append("t.end_time >= ?")
+        params.append(from_ts)
+    if date_to is not None:
+        to_ts = datetime.combine(date_to + timedelta(days=1), dt_time.min, tzinfo=timezone.utc).timestamp()
+        conditions.append("t.start_time < ?")
+        params.append(to_ts)
+
+    if bbox is not None:
+        min_lat, min_lon, max_lat, max_lon = bbox
+        sql = ("SELECT DISTINCT t.path, t.start_time, t.end_time "
+               "FROM segment_bbox s JOIN tracks t ON t.id = s.track_id "
+               "WHERE s.max_lat >= ? AND s.min_lat <= ? AND s.max_lon >= ? AND s.min_lon <= ?")
+        params = [min_lat, max_lat, min_lon, max_lon] + params
+        if conditions:
+            sql += " AND " + " AND ".join(conditions)
+    else:
+        sql = "SELECT t.path, t.start_time, t.end_time FROM tracks t"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+
+    sql += " ORDER BY t.start_time, t.path"
+    return conn.execute(sql, params).fetchall()
+
+
+def _default_db_path(directory):
+    return Path(directory) / INDEX_FILE_NAME
+
+
+def _find_db_path(file_path):
+    """Indeks najbliższego katalogu nad plikiem, w którym już istnieje
+
+    Bez istniejącego indeksu - nowy w katalogu pliku.
+    """
+    directory = Path(file_path).resolve().parent
+    for parent in (directory, *directory.parents):
+        db_path = _default_db_path(parent)
+        if db_path.exists():
+            return db_path
+    return _default_db_path(directory)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Indeks przestrzenny i czasowy archiwum plików GPX")
+    parser.add_argument("--db", help=f"Plik indeksu (domyślnie <katalog>/{INDEX_FILE_NAME}; "
+                                     f"dla add - najbliższy istniejący indeks nad plikiem)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Zbuduj lub zaktualizuj indeks katalogu")
+    build_parser.add_argument("directory", nargs='?', default='.',
+                              help="Katalog z plikami GPX (domyślnie bieżący)")
+    build_parser.add_argument("--force", action="store_true",
+                              help="Przeindeksuj wszystkie pliki")
+
+    add_parser = subparsers.add_parser("add", help="Dodaj pojedyncze pliki do indeksu")
+    add_parser.add_argument("files", nargs='+', help="Pliki GPX")
+
+    query_parser = subparsers.add_parser("query", help="Wyszukaj tracki")
+    query_parser.add_argument("--bbox", nargs=4, type=float,
+                              metavar=("MIN_LAT", "MIN_LON", "MAX_LAT", "MAX_LON"),
+                              help="Obszar, przez który przechodzi track")
+    query_parser.add_argument("--from", dest="date_from", type=date.fromisoformat,
+                              help="Data początkowa (RRRR-MM-DD)")
+    query_parser.add_argument("--to", dest="date_to", type=date.fromisoformat,
+                              help="Data końcowa (RRRR-MM-DD)")
+    query_parser.add_argument("directory", nargs='?', default='.',
+                              help="Katalog z indeksem (domyślnie bieżący)")
+    timings.add_arguments(parser)
+
+    args = parser.parse_args()
+
+    if args.command == "add":
+        db_path = args.db or _find_db_path(args.files[0])
+    else:
+        if not os.path.exists(args.directory):
+            print(f"Błąd: Katalog {args.directory} nie istnieje!")
+            sys.exit(1)
+        db_path = args.db or _default_db_path(args.directory)
+
+    with timings.session(args):
+        conn = open_index(db_path)
+        try:
+            if args.command == "build":
+                added, unchanged, removed, failed = update_index(conn, args.directory, force=args.force)
+                print("-" * 60)
+                print(f"Zaindeksowano: {added}, bez zmian: {unchanged}, usunięto: {removed}, błędy: {failed}")
+
+            elif args.command == "add":
+                with conn, timings.phase('index'):
+                    for file_path in args.files:
+                        try:
+                            index_track(conn, file_path)
+                            timings.count(files=1)
+                            print(f"📍 {file_path}")
+                        except Exception as e:
+                            print(f"❌ Błąd przy indeksowaniu {file_path}: {e}")
+
+            elif args.command == "query":
+                with timings.phase('query'):
+                    results = query_tracks(conn, bbox=args.bbox,
+                                           date_from=args.date_from, date_to=args.date_to)
+                for path, start_time, _ in results:
+                    if start_time is not None:
+                        day = datetime.fromtimestamp(start_time, tz=timezone.utc).date()
+                        print(f"{format_date_polish(day):>24}  {path}")
+                    else:
+                        print(f"{'?':>24}  {path}")
+                print(f"\nZnaleziono {len(results)} tracków")
+        finally:
+            conn.close()
+
+if __name__ == "__main__":
+    main()
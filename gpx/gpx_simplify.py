@@ -0,0 +1,256 @@
+import os
+import sys
+import heapq
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+import numpy as np
+
+import timings
+
+from .gpx_cache import _local_name
+
+EARTH_RADIUS = 6371008.8  # metry
+
+
+def format_size(size_bytes):
+    """Formatuje rozmiar w czytelnej formie"""
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if size_bytes < 1024:
+            return f"{size_bytes:.2f} {unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.2f} PB"
+
+
+def project_to_metres(lat, lon):
+    """Rzutuje współrzędne na lokalną płaszczyznę (equirectangular) w metrach"""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    if lat.size == 0:
+        return lat, lon
+    cos_lat0 = np.cos(lat.mean())
+    return EARTH_RADIUS * lon * cos_lat0, EARTH_RADIUS * lat
+
+
+def douglas_peucker(x, y, tolerance):
+    """Maska punktów zachowanych przez algorytm Douglasa-Peuckera
+
+    Zamiast rekurencji wszystkie przedziały z tego samego poziomu są
+    przetwarzane jedną operacją NumPy, więc liczba iteracji w Pythonie
+    to głębokość podziału, a nie liczba przedziałów.
+    """
+    n = len(x)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+
+    starts = np.array([0])
+    ends = np.array([n - 1])
+    while True:
+        lengths = ends - starts - 1
+        nonempty = lengths > 0
+        starts, ends, lengths = starts[nonempty], ends[nonempty], lengths[nonempty]
+        if starts.size == 0:
+            break
+
+        # Rozwiń wszystkie przedziały do jednej płaskiej tablicy punktów wewnętrznych
+        bounds = np.cumsum(lengths) - lengths
+        range_ids = np.repeat(np.arange(starts.size), lengths)
+        idx = np.arange(lengths.sum()) - bounds[range_ids] + starts[range_ids] + 1
+        s = starts[range_ids]
+        e = ends[range_ids]
+
+        dx = x[e] - x[s]
+        dy = y[e] - y[s]
+        px = x[idx] - x[s]
+        py = y[idx] - y[s]
+        norm = np.hypot(dx, dy)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dist = np.where(norm > 0, np.abs(dx * py - dy * px) / norm, np.hypot(px, py))
+
+        # Najdalszy punkt w każdym przedziale (pierwszy przy remisie)
+        maxes = np.maximum.reduceat(dist, bounds)
+        candidates = np.flatnonzero(dist == maxes[range_ids])
+        _, first = np.unique(range_ids[candidates], return_index=True)
+        split = idx[candidates[first]]
+
+        to_split = maxes > tolerance
+        split = split[to_split]
+        keep[split] = True
+        starts = np.concatenate([starts[to_split], split])
+        ends = np.concatenate([split, ends[to_split]])
+
+    return keep
+
+
+def _triangle_areas(x, y, prev_idx, idx, next_idx):
+    return 0.5 * np.abs((x[prev_idx] - x[idx]) * (y[next_idx] - y[idx])
+                        - (x[next_idx] - x[idx]) * (y[prev_idx] - y[idx]))
+
+
+def visvalingam_whyatt(x, y, tolerance):
+    """Maska punktów zachowanych przez algorytm Visvalingama-Whyatta
+
+    Próg powierzchni efektywnej to tolerance² (m²). Początkowe pola trójkątów
+    liczone są wektorowo, usuwanie odbywa się przez kopiec.
+    """
+    n = len(x)
+    if n < 3:
+        return np.ones(n, dtype=bool)
+
+    threshold = tolerance * tolerance
+    interior = np.arange(1, n - 1)
+    initial = _triangle_areas(x, y, interior - 1, interior, interior + 1)
+
+    # Pętla usuwania działa na listach - indeksowanie skalarne w NumPy jest wolne
+    xs, ys = x.tolist(), y.tolist()
+    prev = list(range(-1, n - 1))
+    nxt = list(range(1, n + 1))
+    areas = [float('inf')] + initial.tolist() + [float('inf')]
+    removed = [False] * n
+
+    heap = [(areas[i], i) for i in (interior[initial < threshold]).tolist()]
+    heapq.heapify(heap)
+    while heap:
+        area, i = heapq.heappop(heap)
+        if removed[i] or area != areas[i]:
+            continue
+        removed[i] = True
+        p, q = prev[i], nxt[i]
+        nxt[p] = q
+        prev[q] = p
+        for j in (p, q):
+            if 0 < j < n - 1:
+                a, c = prev[j], nxt[j]
+                new_area = 0.5 * abs((xs[a] - xs[j]) * (ys[c] - ys[j]) - (xs[c] - xs[j]) * (ys[a] - ys[j]))
+                # Pole nie może zmaleć poniżej pola właśnie usuniętego punktu
+                new_area = max(new_area, area)
+                areas[j] = new_area
+                if new_area < threshold:
+                    heapq.heappush(heap, (new_area, j))
+
+    return ~np.array(removed, dtype=bool)
+
+
+METHODS = {
+    'dp': douglas_peucker,
+    'vw': visvalingam_whyatt,
+}
+
+
+def _register_namespaces(gpx_path):
+    """Rejestruje prefiksy namespace z pliku, aby zapis zachował oryginalne nazwy"""
+    for _, (prefix, uri) in ET.iterparse(gpx_path, events=('start-ns',)):
+        ET.register_namespace(prefix, uri)
+
+
+def simplify_gpx_file(gpx_path, output_path, tolerance, method='dp'):
+    """Upraszcza wszystkie segmenty w pliku GPX i zapisuje wynik
+
+    Zwraca (punkty przed, punkty po).
+    """
+    simplify = METHODS[method]
+    _register_namespaces(gpx_path)
+    tree = ET.parse(gpx_path)
+
+    points_before = points_after = 0
+    for trkseg in tree.getroot().iter():
+        if _local_name(trkseg.tag) != 'trkseg':
+            continue
+        trkpts = [child for child in trkseg if _local_name(child.tag) == 'trkpt']
+        if not trkpts:
+            continue
+
+        lat = np.fromiter((float(p.get('lat')) for p in trkpts), dtype=np.float64, count=len(trkpts))
+        lon = np.fromiter((float(p.get('lon')) for p in trkpts), dtype=np.float64, count=len(trkpts))
+        x, y = project_to_metres(lat, lon)
+        keep = simplify(x, y, tolerance)
+
+        for point, kept in zip(trkpts, keep.tolist()):
+            if not kept:
+                trkseg.remove(point)
+
+        points_before += len(trkpts)
+        points_after += int(keep.sum())
+
+    tmp_path = Path(str(output_path) + '.tmp')
+    tree.write(tmp_path, encoding='utf-8', xml_declaration=True)
+    os.replace(tmp_path, output_path)
+    return points_before, points_after
+
+
+def simplify_directory(directory='.', tolerance=5.0, method='dp', output=None):
+    """Upraszcza pliki GPX z katalogu
+
+    Gdy output jest None, pliki są nadpisywane w miejscu, w przeciwnym razie
+    uproszczone kopie trafiają do katalogu output.
+    """
+    directory = Path(directory)
+    if output is not None:
+        output = Path(output)
+        output.mkdir(parents=True, exist_ok=True)
+
+    print(f"Przeszukuję katalog: {directory}")
+    print(f"Tryb: {'NADPISYWANIE' if output is None else f'KOPIE DO {output}'}"
+          f" (metoda: {method}, tolerancja: {tolerance} m)")
+    print("-" * 60)
+
+    total_before = total_after = 0
+    with timings.phase('scan'):
+        gpx_files = sorted(directory.glob('*.gpx'))
+    for file_path in gpx_files:
+        target = file_path if output is None else output / file_path.name
+        try:
+            with timings.phase('simplify'):
+                size_before = file_path.stat().st_size
+                points_before, points_after = simplify_gpx_file(file_path, target, tolerance, method)
+                size_after = target.stat().st_size
+                timings.count(files=1, nbytes=size_before)
+        except Exception as e:
+            print(f"❌ Błąd przy upraszczaniu {file_path.name}: {e}")
+            continue
+
+        total_before += size_before
+        total_after += size_after
+        reduction = 100 * (1 - size_after / size_before) if size_before else 0
+        print(f"✂️  {file_path.name}: {points_before} → {points_after} punktów, "
+              f"{format_size(size_before)} → {format_size(size_after)} (-{reduction:.1f}%)")
+
+    print("-" * 60)
+    if total_before:
+        print(f"Łącznie: {format_size(total_before)} → {format_size(total_after)} "
+              f"(zaoszczędzono {format_size(total_before - total_after)}, "
+              f"-{100 * (1 - total_after / total_before):.1f}%)")
+    else:
+        print("Brak plików GPX do uproszczenia.")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Upraszcza tracki GPX (Douglas-Peucker / Visvalingam-Whyatt)")
+    parser.add_argument("directory", nargs='?', default='.',
+                       help="Katalog z plikami GPX (domyślnie bieżący)")
+    parser.add_argument("--tolerance", type=float, default=5.0,
+                       help="Tolerancja w metrach (domyślnie 5)")
+    parser.add_argument("--method", choices=sorted(METHODS), default='dp',
+                       help="Algorytm: dp (Douglas-Peucker) lub vw (Visvalingam-Whyatt)")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--output", help="Katalog na uproszczone kopie")
+    group.add_argument("--in-place", action="store_true",
+                       help="Nadpisz oryginalne pliki")
+    timings.add_arguments(parser)
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.directory):
+        print(f"Błąd: Katalog {args.directory} nie istnieje!")
+        sys.exit(1)
+
+    with timings.session(args):
+        simplify_directory(args.directory, args.tolerance, args.method,
+                           output=None if args.in_place else args.output)
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ import re
 from datetime import datetime
 from pathlib import Path
 
+import timings
+
 def extract_date_from_gpx(file_path):
     """Wyciąga datę z pierwszego punktu trackingowego w pliku GPX"""
     try:
@@ -68,7 +70,7 @@ def rename_gpx_files(directory='.', dry_run=True):
     # Znajdź pliki GPX bez właściwego nazewnictwa
     files_to_rename = []
     
-    for file_path in directory.glob('*.gpx'):
+    for file_path in timings.iter_phase('scan', directory.glob('*.gpx')):
         filename = file_path.name
         
         # Sprawdź czy plik ma już właściwe nazewnictwo (zaczyna się od numeru i daty)
@@ -77,7 +79,9 @@ def rename_gpx_files(directory='.', dry_run=True):
             continue
         
         # Wyciągnij datę z pliku
-        date_obj = extract_date_from_gpx(file_path)
+        with timings.phase('parse'):
+            date_obj = extract_date_from_gpx(file_path)
+            timings.count(files=1)
         
         if date_obj:
             files_to_rename.append((file_path, date_obj))
@@ -129,7 +133,8 @@ def rename_gpx_files(directory='.', dry_run=True):
                         print(f"     ⚠️  UWAGA: Plik {new_name} już istnieje!")
                         continue
                     
-                    file_path.rename(new_path)
+                    with timings.phase('rename'):
+                        file_path.rename(new_path)
                     print(f"     ✅ ZMIENIONO")
                     
                 except Exception as e:
@@ -152,6 +157,7 @@ def main():
                        help="Katalog z plikami GPX (domyślnie bieżący)")
     parser.add_argument("--rename", action="store_true", 
                        help="Rzeczywiście zmień nazwy (domyślnie tylko podgląd)")
+    timings.add_arguments(parser)
     
     args = parser.parse_args()
     
@@ -163,7 +169,8 @@ def main():
         print("UWAGA: Tryb podglądu. Dodaj --rename aby rzeczywiście zmienić nazwy.")
         print()
     
-    rename_gpx_files(args.directory, dry_run=not args.rename)
+    with timings.session(args):
+        rename_gpx_files(args.directory, dry_run=not args.rename)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
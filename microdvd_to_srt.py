@@ -1,57 +1,349 @@
 import os
 import re
+import sys
+import time
+import ctypes
+import select
+import signal
+import struct
+import argparse
+from fractions import Fraction
+from functools import partial
 
-FPS = 23.976
+import timings
+from fswalk import walk
+from subtitles import (FPS, decode_subtitles, format_timecodes, frame_to_timecode, frames_to_ms,
+                       iter_srt, parse_fps, parse_microdvd, parse_scale)
 
-def frame_to_timecode(frame):
-    seconds = frame / FPS
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
-    millis = int((seconds - int(seconds)) * 1000)
-    return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
+# Plik MicroDVD zaczyna się od {klatka}{klatka} lub [klatka][klatka] (opcjonalnie po BOM)
+MICRODVD_SIGNATURE = re.compile(rb'(?:\xef\xbb\xbf)?\s*[\{\[]\d+[\}\]][\{\[]\d+[\}\]]')
+SNIFF_BYTES = 64
 
-def convert_microdvd_to_srt(txt_path):
-    srt_path = txt_path.rsplit('.', 1)[0] + ".srt"
-    try:
-        with open(txt_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-    except UnicodeDecodeError:
-        # fallback na CP1250 przy polskich znakach
-        with open(txt_path, 'r', encoding='cp1250') as f:
-            lines = f.readlines()
-
-    srt_lines = []
-    counter = 1
-    # obsługa formatu {start}{end} lub [start][end]
-    pattern = re.compile(r"[\{\[](\d+)[\}\]][\{\[](\d+)[\}\]]\s*(.*)")
-
-    for line in lines:
-        match = pattern.match(line)
-        if match:
-            start_frame = int(match.group(1))
-            end_frame = int(match.group(2))
-            # zamień '|' na nową linię i usuń wiodące '/' z każdej linii
-            raw = match.group(3)
-            lines_txt = raw.replace('|', '\n').split('\n')
-            text = '\n'.join(part.lstrip('/') for part in lines_txt)
-
-            start_time = frame_to_timecode(start_frame)
-            end_time = frame_to_timecode(end_frame)
-
-            # dodajemy dodatkowy pusty wiersz między wpisami
-            srt_lines.append(f"{counter}\n{start_time} --> {end_time}\n{text.strip()}\n\n")
-            counter += 1
+# Tryb --watch: czas ciszy po ostatnim zdarzeniu pliku, zanim ruszy konwersja
+DEBOUNCE_SECONDS = 0.1
+
+# Stałe inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct('iIII')
+# IN_CREATE tylko dla nowych katalogów - plik jest gotowy dopiero po
+# IN_CLOSE_WRITE (koniec zapisu) lub IN_MOVED_TO (przeniesienie)
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_ONLYDIR
+FILE_READY_MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+
+def srt_path_for(txt_path):
+    return txt_path.rsplit('.', 1)[0] + ".srt"
+
+def write_srt(txt_path, srt_path, data=None, fps=None, force_fps=False, offset_ms=0, scale=1):
+    """Konwertuje plik MicroDVD do SRT bez wypisywania komunikatów
+
+    Plik jest czytany raz (albo podana jest już jego treść w data),
+    a wpisy trafiają strumieniowo do buforowanego zapisu. FPS pochodzi
+    z nagłówka pliku, a gdy go brak (lub force_fps) - z parametru fps.
+    Zwraca użyty FPS.
+    """
+    if data is None:
+        with open(txt_path, 'rb') as f:
+            data = f.read()
+    text, _ = decode_subtitles(data)
+
+    store = parse_microdvd(text, fps=fps, force_fps=force_fps)
+    used_fps = store.fps
+    store = store.to_ms(offset_ms, scale)
 
     with open(srt_path, 'w', encoding='utf-8') as f:
-        f.writelines(srt_lines)
+        f.writelines(iter_srt(store))
+    return used_fps
 
+def convert_microdvd_to_srt(txt_path, **timing):
+    srt_path = srt_path_for(txt_path)
+    write_srt(txt_path, srt_path, **timing)
     print(f"✔️ Skonwertowano: {txt_path} → {srt_path}")
 
-def convert_all_txt_in_folder():
-    for filename in os.listdir('.'):
-        if filename.lower().endswith('.txt'):
-            convert_microdvd_to_srt(filename)
+def looks_like_microdvd(txt_path):
+    """Sprawdza po pierwszych bajtach, czy plik .txt to napisy MicroDVD"""
+    with open(txt_path, 'rb') as f:
+        head = f.read(SNIFF_BYTES)
+    return MICRODVD_SIGNATURE.match(head) is not None
+
+def iter_pending_txt(root, recursive=True, force=False):
+    """Generator plików .txt, dla których brak aktualnego .srt
+
+    Każdy katalog jest listowany raz (fswalk.walk), więc .txt i .srt z tego
+    samego katalogu są porównywane bez dodatkowych wywołań stat dla
+    nieistniejących plików. Plik jest pomijany, jeśli jego .srt ma mtime
+    nie starszy niż źródło.
+    """
+    for _, _, _, files in walk(root, recursive=recursive):
+        srt_mtimes = {}
+        txt_entries = []
+        for entry in files:
+            stem, ext = os.path.splitext(entry.name)
+            ext = ext.lower()
+            if ext == '.txt':
+                txt_entries.append(entry)
+            elif ext == '.srt' and not force:
+                try:
+                    srt_mtimes[stem] = entry.stat().st_mtime_ns
+                except OSError:
+                    pass
+
+        for entry in txt_entries:
+            srt_mtime = srt_mtimes.get(os.path.splitext(entry.name)[0])
+            if srt_mtime is not None:
+                try:
+                    if srt_mtime >= entry.stat().st_mtime_ns:
+                        continue
+                except OSError:
+                    continue
+            yield entry.path
+
+def _convert_if_microdvd(txt_path, **timing):
+    """Zadanie dla puli procesów; zwraca (status, komunikat błędu)"""
+    try:
+        # Jedno otwarcie pliku: nagłówek do rozpoznania, reszta tylko dla MicroDVD
+        with open(txt_path, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+            if MICRODVD_SIGNATURE.match(head) is None:
+                return 'not-microdvd', None
+            data = head + f.read()
+        write_srt(txt_path, srt_path_for(txt_path), data, **timing)
+    except FileNotFoundError:
+        # Plik zniknął (np. przeniesiony) zanim doszło do konwersji
+        return 'missing', None
+    except Exception as e:
+        return 'error', str(e)
+    return 'converted', None
+
+def convert_tree(root='.', recursive=True, jobs=1, force=False, **timing):
+    """Konwertuje wszystkie pliki MicroDVD w drzewie katalogów
+
+    Pliki z aktualnym .srt są pomijane bez otwierania, pozostałe .txt są
+    rozpoznawane po pierwszych bajtach i konwertowane w puli procesów.
+    Dodatkowe argumenty (fps, force_fps, offset_ms, scale) trafiają do write_srt.
+    """
+    with timings.phase('scan'):
+        pending = list(iter_pending_txt(root, recursive=recursive, force=force))
+    convert = partial(_convert_if_microdvd, **timing)
+
+    if jobs > 1 and len(pending) > 1:
+        # Import dopiero tutaj - multiprocessing wydłuża start skryptu
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        results = executor.map(convert, pending,
+                               chunksize=max(1, len(pending) // (jobs * 8)))
+    else:
+        executor = None
+        results = map(convert, pending)
+
+    counts = {'converted': 0, 'not-microdvd': 0, 'missing': 0, 'error': 0}
+    try:
+        with timings.phase('convert'):
+            for txt_path, (status, error) in zip(pending, results):
+                counts[status] += 1
+                if status == 'converted':
+                    timings.count(files=1)
+                    print(f"✔️ Skonwertowano: {txt_path} → {srt_path_for(txt_path)}")
+                elif status == 'error':
+                    print(f"❌ Błąd przy konwersji {txt_path}: {error}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    print(f"Skonwertowano: {counts['converted']}, pominięto (nie MicroDVD): {counts['not-microdvd']}, "
+          f"błędy: {counts['error']}")
+    return counts
+
+def _ignore_sigint():
+    """Inicjalizator procesów roboczych - Ctrl+C obsługuje tylko proces główny"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _stop_on_sigterm(signum, frame):
+    # SIGTERM (np. od systemd) kończy obserwowanie tak samo jak Ctrl+C
+    raise KeyboardInterrupt
+
+class InotifyError(OSError):
+    """Błąd samego inotify: brak w systemie, inotify_init1 lub inotify_add_watch"""
+
+class Inotify:
+    """Minimalna obsługa inotify przez ctypes (tylko Linux)"""
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise InotifyError("inotify nie jest dostępne w tym systemie")
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise InotifyError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self.paths = {}
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise InotifyError(ctypes.get_errno(), os.strerror(ctypes.get_errno()), path)
+        self.paths[wd] = path
+        return wd
+
+    def add_tree(self, root, recursive=True):
+        """Obserwuje katalog (i podkatalogi); zwraca liczbę obserwowanych katalogów
+
+        Katalogi, których nie da się obserwować (np. usunięte w międzyczasie),
+        są pomijane.
+        """
+        added = 0
+        for directory, _, _, _ in walk(root, recursive=recursive):
+            try:
+                self.add_watch(directory)
+                added += 1
+            except InotifyError:
+                continue
+        return added
+
+    def read_events(self):
+        """Zwraca listę (ścieżka, maska) dla zdarzeń gotowych do odczytu"""
+        events = []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return events
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(buffer, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(buffer[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_IGNORED:
+                self.paths.pop(wd, None)
+                continue
+            directory = self.paths.get(wd)
+            if directory is None and not mask & IN_Q_OVERFLOW:
+                continue
+            events.append((os.path.join(directory, name) if directory else None, mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+def watch_tree(root='.', recursive=True, jobs=1, debounce=DEBOUNCE_SECONDS, **timing):
+    """Konwertuje na bieżąco nowe i zmienione pliki MicroDVD (Linux, inotify)
+
+    Najpierw nadrabia zaległe pliki jak convert_tree, potem czeka na
+    zdarzenia. Kolejne zdarzenia tego samego pliku przesuwają jego termin
+    o debounce sekund, więc seria zapisów daje jedną konwersję. Nowe
+    podkatalogi są od razu obserwowane i przeglądane. Działa do Ctrl+C
+    lub SIGTERM.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    inotify = Inotify()
+    convert = partial(_convert_if_microdvd, **timing)
+    executor = ProcessPoolExecutor(max_workers=max(1, jobs), initializer=_ignore_sigint)
+    # ścieżka .txt -> termin konwersji (time.monotonic)
+    due = {}
+
+    def report(txt_path, future):
+        status, error = future.result()
+        if status == 'converted':
+            timings.count(files=1)
+            print(f"✔️ Skonwertowano: {txt_path} → {srt_path_for(txt_path)}", flush=True)
+        elif status == 'error':
+            print(f"❌ Błąd przy konwersji {txt_path}: {error}", flush=True)
+
+    def schedule(txt_paths):
+        deadline = time.monotonic() + debounce
+        for txt_path in txt_paths:
+            due[txt_path] = deadline
+
+    signal.signal(signal.SIGTERM, _stop_on_sigterm)
+    try:
+        # Katalog główny osobno - jego błąd ma przerwać obserwowanie
+        inotify.add_watch(root)
+        watched = inotify.add_tree(root, recursive=recursive)
+        convert_tree(root, recursive=recursive, jobs=jobs, **timing)
+        print(f"👀 Obserwuję {watched} katalogów w {root} (Ctrl+C kończy)", flush=True)
+
+        while True:
+            timeout = max(0.0, min(due.values()) - time.monotonic()) if due else None
+            readable, _, _ = select.select([inotify.fd], [], [], timeout)
+            if readable:
+                for path, mask in inotify.read_events():
+                    if mask & IN_Q_OVERFLOW:
+                        # Zgubione zdarzenia - jednorazowo nadrabiamy cały katalog
+                        schedule(iter_pending_txt(root, recursive=recursive))
+                    elif mask & IN_ISDIR:
+                        if recursive:
+                            inotify.add_tree(path)
+                            schedule(iter_pending_txt(path))
+                    elif mask & FILE_READY_MASK and path.lower().endswith('.txt'):
+                        schedule([path])
+
+            now = time.monotonic()
+            ready = [txt_path for txt_path, deadline in due.items() if deadline <= now]
+            for txt_path in ready:
+                del due[txt_path]
+                future = executor.submit(convert, txt_path)
+                future.add_done_callback(partial(report, txt_path))
+    except KeyboardInterrupt:
+        print("\nKończę obserwowanie.")
+    finally:
+        executor.shutdown(cancel_futures=True)
+        inotify.close()
+
+def convert_all_txt_in_folder(folder='.'):
+    convert_tree(folder, recursive=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Konwertuje napisy MicroDVD (.txt) do SubRip (.srt)")
+    parser.add_argument("directory", nargs='?', default='.',
+                        help="Katalog z napisami (domyślnie bieżący)")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Przeszukuj podkatalogi")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument("--force", action="store_true",
+                        help="Konwertuj także pliki z aktualnym .srt")
+    parser.add_argument("--fps", type=parse_fps, default=FPS,
+                        help="FPS dla plików bez nagłówka {1}{1}FPS (domyślnie 23.976, np. 25, 29.97, 24000/1001)")
+    parser.add_argument("--force-fps", action="store_true",
+                        help="Używaj --fps także dla plików z nagłówkiem")
+    parser.add_argument("--offset", type=float, default=0.0, metavar="SEKUNDY",
+                        help="Przesunięcie wszystkich napisów (może być ujemne)")
+    parser.add_argument("--scale", type=parse_scale, default=Fraction(1),
+                        help="Rozciągnięcie czasu, np. 1.001 albo 23.976/25 (film PAL)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Po konwersji obserwuj katalog (inotify, Linux) i konwertuj nowe pliki na bieżąco")
+    parser.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS, metavar="SEKUNDY",
+                        help=f"Tryb --watch: odczekaj tyle po ostatniej zmianie pliku (domyślnie {DEBOUNCE_SECONDS})")
+    timings.add_arguments(parser)
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        print(f"Błąd: Katalog {args.directory} nie istnieje!")
+        sys.exit(1)
+
+    timing = dict(fps=args.fps, force_fps=args.force_fps,
+                  offset_ms=round(args.offset * 1000), scale=args.scale)
+    with timings.session(args):
+        if args.watch:
+            try:
+                watch_tree(args.directory, recursive=args.recursive, jobs=args.jobs,
+                           debounce=args.debounce, **timing)
+            except InotifyError as e:
+                print(f"Błąd: Tryb --watch wymaga inotify (Linux): {e}")
+                sys.exit(1)
+            except OSError as e:
+                print(f"Błąd w trybie --watch: {e}")
+                sys.exit(1)
+        else:
+            convert_tree(args.directory, recursive=args.recursive, jobs=args.jobs, force=args.force,
+                         **timing)
 
 if __name__ == "__main__":
-    convert_all_txt_in_folder()
+    main()
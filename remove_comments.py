@@ -1,81 +1,598 @@
 import os
-import sys
 import re
+import json
+import hashlib
+import shutil
+import argparse
 import tokenize
+from collections import deque
 from io import StringIO
 
+import timings
+from fswalk import iter_files, walk
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Obsługiwane rozszerzenia plików
+PYTHON_EXTENSIONS = {'.py'}
+JS_LIKE_EXTENSIONS = {'.c', '.cpp', '.h', '.hpp', '.ts', '.tsx'}
+SUPPORTED_EXTENSIONS = PYTHON_EXTENSIONS | JS_LIKE_EXTENSIONS
+TS_EXTENSIONS = {'.ts', '.tsx'}
+# Pliki z JSX - "</" zamyka znacznik, a nie zaczyna regex
+JSX_EXTENSIONS = {'.tsx'}
+
+# Manifest przetworzonych plików (w katalogu głównym przetwarzania)
+MANIFEST_FILE_NAME = '.remove_comments_manifest.json'
+MANIFEST_VERSION = 1
+
+# Rozmiar bloku przy liczeniu hasha pliku
+HASH_CHUNK_SIZE = 1 << 20
+
+# ioctl FICLONE (Linux) - kopia współdzieląca bloki na btrfs/XFS
+FICLONE = 0x40049409
+
+# Katalogi pomijane przy przechodzeniu drzewa (porównanie bez wielkości liter)
+SKIP_DIRS = {
+    'venv', 'env', '.venv', '__pycache__', '.idea',
+    'include', 'lib', 'scripts', 'site-packages'}
+
+def iter_python_without_comments(readline):
+    """Strumieniowo zwraca fragmenty kodu Python bez komentarzy
+
+    Tokeny z tokenize są konsumowane leniwie; między usuniętymi komentarzami
+    kopiowane są oryginalne fragmenty źródła, więc układ kodu pozostaje
+    nietknięty. Linie są oddawane przy każdym tokenie NEWLINE/NL, więc
+    w pamięci zostaje tylko bieżąca linia logiczna.
+    Linia zawierająca wyłącznie komentarz znika w całości, komentarz na
+    końcu linii jest usuwany razem z poprzedzającymi go spacjami.
+    """
+    pending = deque()
+    first_row = 1
+    col = 0
+
+    def tracking_readline():
+        line = readline()
+        if line:
+            pending.append(line)
+        return line
+
+    for token in tokenize.generate_tokens(tracking_readline):
+        if token.type == tokenize.NEWLINE or token.type == tokenize.NL:
+            # Linie do końca tego tokenu są kompletne
+            while first_row <= token.start[0]:
+                yield pending.popleft()[col:]
+                first_row += 1
+                col = 0
+            continue
+        if token.type != tokenize.COMMENT:
+            continue
+        row, start = token.start
+
+        while first_row < row:
+            yield pending.popleft()[col:]
+            first_row += 1
+            col = 0
+
+        line = pending[0]
+        if line[:start].strip():
+            yield line[col:start].rstrip(' \t\f')
+            col = token.end[1]
+        else:
+            pending.popleft()
+            first_row += 1
+            col = 0
+
+    for line in pending:
+        yield line[col:]
+        col = 0
+
 def remove_comments_from_python_code(code):
-    code = "\n".join(line.rstrip() for line in code.splitlines() if not re.match(r'^\s*#', line))
-    tokens = tokenize.generate_tokens(StringIO(code).readline)
-    tokens_without_comments = [tok for tok in tokens if tok.type != tokenize.COMMENT]
-    return tokenize.untokenize(tokens_without_comments)
+    """Wersja dla tekstu w pamięci; pliki przetwarza strumieniowo strip_file"""
+    return ''.join(iter_python_without_comments(StringIO(code).readline))
 
-def remove_comments_from_js_like_code(code):
-    result = []
-    for line in code.splitlines():
-        # Unikaj usuwania // które są częścią URL-i (http://, https://, ws://, wss://, smb://, ftp://, itp.)
-        line = re.sub(r'(?<!:)//(?!/).*$', '', line)
-        result.append(line)
+# Tokeny, przy których lekser C/C++/TS musi coś zdecydować (klamry tylko
+# wewnątrz ${...} w template literal)
+_JS_LIKE_TOKEN = re.compile(r'//|/\*|["\'`/]')
+_JS_LIKE_TOKEN_IN_TEMPLATE = re.compile(r'//|/\*|["\'`/{}]')
+_NEWLINE_RUN = re.compile(r'\n{3,}')
+_TRIPLE_SLASH_DIRECTIVE = re.compile(r'///[ \t]*<')
+_STRING_LITERAL = {
+    '"': re.compile(r'"(?:[^"\\\n]|\\[\s\S])*"?'),
+    "'": re.compile(r"'(?:[^'\\\n]|\\[\s\S])*'?"),
+}
+_RAW_STRING_OPEN = re.compile(r'"([^()\\\s]{0,16})\(')
+_TEMPLATE_TEXT = re.compile(r'(?:[^`\\$]|\\[\s\S]|\$(?!\{))*')
+_REGEX_LITERAL = re.compile(r'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*')
+_TRAILING_WORD = re.compile(r'[A-Za-z_$][\w$]*$')
 
-    code = '\n'.join(result)
+# Po tych słowach kluczowych "/" zaczyna literał wyrażenia regularnego
+_REGEX_KEYWORDS = {
+    'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+    'void', 'throw', 'instanceof', 'yield', 'await'}
 
-    def replace_comment(match):
-        comment_text = match.group(0)
-        lines = comment_text.splitlines()
+def _regex_allowed(last_code):
+    """Czy "/" po danym fragmencie kodu zaczyna regex (a nie dzielenie)"""
+    if not last_code:
+        return True
+    last_char = last_code[-1]
+    if last_char in ')]}':
+        return False
+    if last_char.isalnum() or last_char in '_$':
+        word = _TRAILING_WORD.search(last_code)
+        return word is not None and word.group() in _REGEX_KEYWORDS
+    return True
 
-        if len(lines) <= 2:
-            return ' '
+def _scan_template(code, pos):
+    """Przechodzi tekst template literal od pos; zwraca (koniec, czy_otwarto_${)"""
+    pos = _TEMPLATE_TEXT.match(code, pos).end()
+    if pos >= len(code):
+        return pos, False
+    if code[pos] == '`':
+        return pos + 1, False
+    return pos + 2, True  # "${"
 
-        empty_lines_before = 0
-        i = 0
-        while i < len(lines) and lines[i].strip() == '':
-            empty_lines_before += 1
-            i += 1
+def remove_comments_from_js_like_code(code, regex_literals=False, jsx=False):
+    """Usuwa komentarze // i /* */ z kodu C/C++/TS jednym przejściem leksera
 
-        empty_lines_after = 0
-        i = len(lines) - 1
-        while i >= 0 and lines[i].strip() == '':
-            empty_lines_after += 1
-            i -= 1
+    Napisy, znaki, surowe napisy C++ (R"(...)"), template literals
+    (z zagnieżdżonymi ${...}) oraz - gdy regex_literals - literały wyrażeń
+    regularnych TS są przepisywane bez zmian, więc "//" i "/*" w ich środku
+    nie są traktowane jak komentarze. Komentarz blokowy zamieniany jest na
+    spację, dyrektywy /// <...> są zachowywane, a więcej niż jedna pusta
+    linia poza literałami jest zwijana do jednej. Z jsx=True "/" tuż po "<"
+    to znacznik zamykający JSX, a "//" po ":" (adres URL) lub przed
+    znacznikiem zamykającym w tej samej linii to tekst JSX, nie komentarz:
 
-        if empty_lines_before > 0 and empty_lines_after > 0:
-            return '\n'
-        return ' '
+    >>> remove_comments_from_js_like_code('<a>x</a> // c\\n', regex_literals=True, jsx=True)
+    '<a>x</a> \\n'
+    >>> remove_comments_from_js_like_code('<a href="https://x.io">https://x.io</a>;\\n',
+    ...                                   regex_literals=True, jsx=True)
+    '<a href="https://x.io">https://x.io</a>;\\n'
+    """
+    out = []
+    append = out.append
+    length = len(code)
+    pos = 0
+    # Liczba znaków nowej linii, którymi kończy się dotychczasowy wynik
+    newline_run = 0
+    last_code = ''
+    # Liczba otwartych nawiasów { w każdym aktywnym ${...}
+    template_depths = []
 
-    code = re.sub(r'/\*[\s\S]*?\*/', replace_comment, code)
+    def emit_code(text):
+        """Dopisuje kod spoza literałów, zwijając puste linie"""
+        nonlocal newline_run, last_code
+        if '\n\n' in text or (newline_run and text[0] == '\n'):
+            leading = len(text) - len(text.lstrip('\n'))
+            allowed = max(0, 2 - newline_run)
+            if leading > allowed:
+                text = text[leading - allowed:]
+            text = _NEWLINE_RUN.sub('\n\n', text)
+            trailing = len(text) - len(text.rstrip('\n'))
+            newline_run = newline_run + trailing if trailing == len(text) else trailing
+        else:
+            newline_run = 1 if text[-1] == '\n' else 0
+        append(text)
+        if regex_literals and not text.isspace():
+            last_code = text
 
-    code = re.sub(r'\n{3,}', '\n\n', code)
+    while pos < length:
+        pattern = _JS_LIKE_TOKEN_IN_TEMPLATE if template_depths else _JS_LIKE_TOKEN
+        match = pattern.search(code, pos)
+        if match is None:
+            emit_code(code[pos:])
+            break
 
-    return code
+        start = match.start()
+        if start > pos:
+            emit_code(code[pos:start])
 
-def process_file(filepath):
-    with open(filepath, 'r', encoding='utf-8') as f:
-        code = f.read()
+        token = match.group()
+        if token == '//':
+            end = code.find('\n', start)
+            if end == -1:
+                end = length
+            elif code[end - 1] == '\r':
+                # CRLF zostaje w wyniku
+                end -= 1
+            if jsx and (code[start - 1:start] == ':' or '</' in code[start + 2:end]):
+                # Adres URL albo tekst między znacznikami JSX, nie komentarz
+                emit_code('//')
+                pos = start + 2
+                continue
+            if _TRIPLE_SLASH_DIRECTIVE.match(code, start):
+                append(code[start:end])
+                newline_run = 0
+            pos = end
+            continue
+
+        # Wszystko poza usuniętym komentarzem // przerywa ciąg pustych linii
+        newline_run = 0
+        if token == '/*':
+            end = code.find('*/', start + 2)
+            pos = length if end == -1 else end + 2
+            append(' ')
 
+        elif token == '"' or token == "'":
+            raw = None
+            if token == '"' and start > 0 and code[start - 1] == 'R':
+                raw = _RAW_STRING_OPEN.match(code, start)
+            if raw is not None:
+                closing = ')' + raw.group(1) + '"'
+                end = code.find(closing, raw.end())
+                end = length if end == -1 else end + len(closing)
+            else:
+                end = _STRING_LITERAL[token].match(code, start).end()
+            append(code[start:end])
+            last_code = token
+            pos = end
+
+        elif token == '`':
+            end, opened = _scan_template(code, start + 1)
+            append(code[start:end])
+            if opened:
+                template_depths.append(0)
+            last_code = '`'
+            pos = end
+
+        elif token == '{':
+            if template_depths:
+                template_depths[-1] += 1
+            append('{')
+            last_code = '{'
+            pos = start + 1
+
+        elif token == '}':
+            if template_depths and template_depths[-1] == 0:
+                # Koniec ${...} - dalej ciągnie się tekst template literal
+                template_depths.pop()
+                end, opened = _scan_template(code, start + 1)
+                append(code[start:end])
+                if opened:
+                    template_depths.append(0)
+                last_code = '`'
+                pos = end
+            else:
+                if template_depths:
+                    template_depths[-1] -= 1
+                append('}')
+                last_code = '}'
+                pos = start + 1
+
+        else:  # pojedynczy "/"
+            literal = None
+            if (regex_literals and not (jsx and code[start - 1:start] == '<')
+                    and _regex_allowed(last_code.rstrip()[-16:])):
+                literal = _REGEX_LITERAL.match(code, start)
+            if literal is not None:
+                append(literal.group())
+                last_code = 'x'
+                pos = literal.end()
+            else:
+                append('/')
+                last_code = '/'
+                pos = start + 1
+
+    return ''.join(out)
+
+def strip_comments(code, file_ext):
+    """Zwraca kod bez komentarzy albo None dla nieobsługiwanego rozszerzenia"""
+    if file_ext in PYTHON_EXTENSIONS:
+        return remove_comments_from_python_code(code)
+    if file_ext in JS_LIKE_EXTENSIONS:
+        return remove_comments_from_js_like_code(code, regex_literals=file_ext in TS_EXTENSIONS,
+                                                 jsx=file_ext in JSX_EXTENSIONS)
+    return None
+
+def _hash_file(filepath):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), ''):
+            digest.update(chunk.encode('utf-8'))
+    return digest.hexdigest()
+
+def _strip_to(src_path, dst_path, file_ext):
+    """Zapisuje do dst_path src_path bez komentarzy; zwraca (hash źródła, hash wyniku)
+
+    Python jest przetwarzany strumieniowo linia po linii; dla C/C++/TS lekser
+    potrzebuje całego tekstu. Przy błędzie dst_path jest usuwany.
+    """
+    source_digest = hashlib.blake2b(digest_size=16)
+    new_digest = hashlib.blake2b(digest_size=16)
+    try:
+        # newline='' - końce linii (LF, CRLF) są przepisywane bez zmian
+        with open(src_path, 'r', encoding='utf-8', newline='') as src, \
+                open(dst_path, 'w', encoding='utf-8', newline='') as dst:
+            if file_ext in PYTHON_EXTENSIONS:
+                def readline():
+                    line = src.readline()
+                    source_digest.update(line.encode('utf-8'))
+                    return line
+                chunks = iter_python_without_comments(readline)
+            else:
+                code = src.read()
+                source_digest.update(code.encode('utf-8'))
+                chunks = (strip_comments(code, file_ext),)
+            for chunk in chunks:
+                new_digest.update(chunk.encode('utf-8'))
+                dst.write(chunk)
+    except BaseException:
+        try:
+            os.unlink(dst_path)
+        except OSError:
+            pass
+        raise
+    return source_digest.hexdigest(), new_digest.hexdigest()
+
+def strip_file(filepath, known_hash=None):
+    """Usuwa komentarze z pliku; zwraca (status, hash wyniku, rozmiar, mtime_ns)
+
+    Status: 'processed', 'unchanged' (wynik identyczny - plik nie jest
+    zapisywany), 'up-to-date' (treść ma hash z manifestu) lub 'unsupported'.
+    Wynik jest zapisywany strumieniowo do pliku tymczasowego, który zastępuje
+    oryginał (os.replace). Funkcja nic nie wypisuje, więc może działać
+    w puli procesów.
+    """
     file_ext = os.path.splitext(filepath)[1].lower()
+    if file_ext not in SUPPORTED_EXTENSIONS:
+        return 'unsupported', None, None, None
 
-    if file_ext == '.py':
-        new_code = remove_comments_from_python_code(code)
-    elif file_ext in ['.c', '.cpp', '.h', '.hpp', '.ts', '.tsx']:
-        new_code = remove_comments_from_js_like_code(code)
+    if known_hash is not None and _hash_file(filepath) == known_hash:
+        status = 'up-to-date'
+        new_hash = known_hash
     else:
+        tmp_path = filepath + '.tmp'
+        code_hash, new_hash = _strip_to(filepath, tmp_path, file_ext)
+        if new_hash == code_hash:
+            os.unlink(tmp_path)
+            status = 'unchanged'
+        else:
+            shutil.copymode(filepath, tmp_path)
+            os.replace(tmp_path, filepath)
+            status = 'processed'
+
+    st = os.stat(filepath)
+    return status, new_hash, st.st_size, st.st_mtime_ns
+
+def process_file(filepath):
+    status = strip_file(filepath)[0]
+    if status == 'unsupported':
         print(f"Unsupported file type: {filepath}")
-        return
-
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(new_code)
-    print(f"Processed: {filepath}")
-
-def process_directory(directory):
-    for root, dirs, files in os.walk(directory):
-        dirs[:] = [d for d in dirs if d.lower() not in [
-            'venv', 'env', '.venv', '__pycache__', '.idea',
-            'include', 'lib', 'scripts', 'site-packages']]
-        for file in files:
-            file_ext = os.path.splitext(file)[1].lower()
-            if file_ext in ['.py', '.c', '.cpp', '.h', '.hpp', '.ts', '.tsx']:
-                process_file(os.path.join(root, file))
+    elif status == 'processed':
+        print(f"Processed: {filepath}")
+    else:
+        print(f"Unchanged: {filepath}")
+
+def _load_manifest(manifest_path):
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != MANIFEST_VERSION:
+        return {}
+    return data.get('files', {})
+
+def _save_manifest(manifest_path, files):
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': MANIFEST_VERSION, 'files': files}, f)
+    os.replace(tmp_path, manifest_path)
+
+def iter_source_files(directory):
+    """Generator plików o obsługiwanych rozszerzeniach (z pominięciem SKIP_DIRS)"""
+    def is_supported(name):
+        return os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS
+
+    for _, entry in iter_files(directory, is_supported, skip_dirs=SKIP_DIRS):
+        yield entry.path
+
+def _reflink(src, dst):
+    """Tworzy dst jako reflink src; zwraca False gdy system plików nie wspiera"""
+    if fcntl is None:
+        return False
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            pass
+        else:
+            return True
+    os.unlink(dst)
+    return False
+
+def link_or_copy(src, dst):
+    """Umieszcza w dst zawartość src bez kopiowania danych, jeśli to możliwe
+
+    Kolejno: hardlink, reflink, zwykła kopia. Zwraca użytą metodę.
+    """
+    try:
+        os.link(src, dst)
+        return 'hardlink'
+    except OSError:
+        pass
+    if _reflink(src, dst):
+        shutil.copystat(src, dst)
+        return 'reflink'
+    shutil.copy2(src, dst)
+    return 'copy'
+
+def mirror_file(src, dst, strip=True):
+    """Zapisuje do dst wersję src bez komentarzy; zwraca (status, metoda)
+
+    Pliki nieobsługiwane, bez komentarzy i (strip=False) przenoszone bez
+    zmian są linkowane (status 'linked'), pozostałe zapisywane (status
+    'processed', metoda 'write'). Źródło jest czytane przy każdym wywołaniu,
+    więc komentarz dopisany do pliku zlinkowanego wcześniej zamienia link
+    w zwykły plik.
+    """
+    file_ext = os.path.splitext(src)[1].lower()
+    if strip and file_ext in SUPPORTED_EXTENSIONS:
+        tmp_path = dst + '.tmp'
+        source_hash, new_hash = _strip_to(src, tmp_path, file_ext)
+        if new_hash != source_hash:
+            shutil.copymode(src, tmp_path)
+            # rename podmienia wpis katalogu - link do źródła w dst nie jest nadpisywany
+            os.replace(tmp_path, dst)
+            return 'processed', 'write'
+        os.unlink(tmp_path)
+
+    try:
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        pass
+    else:
+        src_stat = os.stat(src)
+        if (dst_stat.st_ino, dst_stat.st_dev) == (src_stat.st_ino, src_stat.st_dev):
+            return 'linked', 'hardlink'
+        os.unlink(dst)
+
+    return 'linked', link_or_copy(src, dst)
+
+def iter_mirror_pairs(directory, output):
+    """Generator trójek (źródło, cel, czy_usuwać_komentarze) dla plików drzewa
+
+    Tworzy katalogi w drzewie docelowym. Zawartość SKIP_DIRS (np. include/,
+    lib/) trafia do kopii bez zmian. Pomija manifest i sam katalog docelowy,
+    jeśli leży wewnątrz źródłowego.
+    """
+    output_real = os.path.realpath(output)
+    for _, rel_dir, _, files in walk(directory,
+                                     prune=lambda entry: os.path.realpath(entry.path) == output_real):
+        target_root = os.path.join(output, rel_dir) if rel_dir else output
+        os.makedirs(target_root, exist_ok=True)
+        strip = not any(part.lower() in SKIP_DIRS for part in rel_dir.split('/'))
+        for entry in files:
+            if entry.name == MANIFEST_FILE_NAME:
+                continue
+            yield entry.path, os.path.join(target_root, entry.name), strip
+
+def mirror_directory(directory, output, jobs=1):
+    """Tworzy w output kopię drzewa directory bez komentarzy
+
+    Źródło pozostaje nietknięte. Zapisywane są tylko pliki, z których
+    faktycznie usunięto komentarze - reszta jest linkowana (hardlink lub
+    reflink), więc koszt to głównie bajty, które się zmieniły.
+    """
+    with timings.phase('scan'):
+        pairs = list(iter_mirror_pairs(directory, output))
+
+    if jobs > 1 and len(pairs) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        results = executor.map(mirror_file, *zip(*pairs), chunksize=max(1, len(pairs) // (jobs * 8)))
+    else:
+        executor = None
+        results = (mirror_file(*pair) for pair in pairs)
+
+    counts = {'processed': 0, 'linked': 0}
+    methods = {'hardlink': 0, 'reflink': 0, 'copy': 0}
+    try:
+        with timings.phase('mirror'):
+            for (src, dst, _), (status, method) in zip(pairs, results):
+                counts[status] += 1
+                timings.count(files=1)
+                if status == 'processed':
+                    print(f"Processed: {src} -> {dst}")
+                else:
+                    methods[method] += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    print(f"Processed: {counts['processed']}, linked: {counts['linked']} "
+          f"(hardlinks: {methods['hardlink']}, reflinks: {methods['reflink']}, copies: {methods['copy']})")
+
+def process_directory(directory, jobs=1, use_manifest=False):
+    """Usuwa komentarze ze wszystkich obsługiwanych plików w drzewie
+
+    Z jobs > 1 pliki przetwarzane są w puli procesów. Z use_manifest
+    w katalogu zapisywany jest manifest (rozmiar, mtime, hash treści)
+    przetworzonych plików - przy kolejnym uruchomieniu pliki, które od tego
+    czasu się nie zmieniły, są pomijane bez czytania.
+    """
+    manifest_path = os.path.join(directory, MANIFEST_FILE_NAME)
+    manifest = _load_manifest(manifest_path) if use_manifest else {}
+    new_manifest = {}
+
+    to_process = []
+    skipped = 0
+    with timings.phase('scan'):
+        for filepath in iter_source_files(directory):
+            rel_path = os.path.relpath(filepath, directory)
+            entry = manifest.get(rel_path)
+            if entry is not None:
+                try:
+                    st = os.stat(filepath)
+                except OSError:
+                    continue
+                if entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                    new_manifest[rel_path] = entry
+                    skipped += 1
+                    continue
+            to_process.append((filepath, rel_path, entry[2] if entry else None))
+
+    if jobs > 1 and len(to_process) > 1:
+        # Import dopiero tutaj - multiprocessing wydłuża start skryptu
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=jobs)
+        results = executor.map(strip_file, [item[0] for item in to_process],
+                               [item[2] for item in to_process],
+                               chunksize=max(1, len(to_process) // (jobs * 8)))
+    else:
+        executor = None
+        results = (strip_file(filepath, known_hash) for filepath, _, known_hash in to_process)
+
+    counts = {'processed': 0, 'unchanged': 0, 'up-to-date': 0}
+    try:
+        with timings.phase('strip'):
+            for (filepath, rel_path, _), result in zip(to_process, results):
+                status, new_hash, size, mtime_ns = result
+                counts[status] += 1
+                timings.count(files=1, nbytes=size)
+                if status == 'processed':
+                    print(f"Processed: {filepath}")
+                new_manifest[rel_path] = [size, mtime_ns, new_hash]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if use_manifest:
+            with timings.phase('manifest'):
+                _save_manifest(manifest_path, new_manifest)
+
+    print(f"Processed: {counts['processed']}, unchanged: {counts['unchanged'] + counts['up-to-date']}, "
+          f"skipped (manifest): {skipped}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Usuwa komentarze z kodu źródłowego")
+    parser.add_argument("directory", nargs='?', default='.',
+                        help="Katalog do przetworzenia (domyślnie bieżący)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument("--manifest", action="store_true",
+                        help=f"Zapisuj manifest {MANIFEST_FILE_NAME} i pomijaj niezmienione pliki")
+    parser.add_argument("-o", "--output", metavar="KATALOG",
+                        help="Zapisz wynik w osobnym drzewie zamiast modyfikować pliki")
+    timings.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.output and args.manifest:
+        parser.error("--manifest nie działa razem z --output")
+    if args.output:
+        source = os.path.realpath(args.directory)
+        output = os.path.realpath(args.output)
+        # Wynik w źródle lub nad nim nadpisałby źródło albo niezwiązane pliki
+        if source == output or source.startswith(os.path.join(output, '')):
+            parser.error("--output nie może być katalogiem źródłowym ani jego katalogiem nadrzędnym")
+
+    with timings.session(args):
+        if args.output:
+            mirror_directory(args.directory, args.output, jobs=args.jobs)
+        else:
+            process_directory(args.directory, jobs=args.jobs, use_manifest=args.manifest)
 
 if __name__ == '__main__':
-    target_dir = sys.argv[1] if len(sys.argv) > 1 else '.'
-    process_directory(target_dir)
\ No newline at end of file
+    main()
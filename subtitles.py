@@ -0,0 +1,413 @@
+import os
+import re
+import sys
+import argparse
+from array import array
+from fractions import Fraction
+from functools import partial
+
+import timings
+
+# Domyślna liczba klatek na sekundę (23.976 = 24000/1001)
+FPS = Fraction(24000, 1001)
+
+# Zaokrąglone zapisy częstotliwości NTSC i ich dokładne wartości
+NTSC_RATES = {
+    '23.976': Fraction(24000, 1001),
+    '23.98': Fraction(24000, 1001),
+    '29.97': Fraction(30000, 1001),
+    '47.952': Fraction(48000, 1001),
+    '59.94': Fraction(60000, 1001),
+}
+
+# Bajty polskich liter, które odróżniają CP1250 od ISO-8859-2 (ą ś ź Ą Ś Ź)
+CP1250_MARKERS = b'\xb9\x9c\x9f\xa5\x8c\x8f'
+ISO_8859_2_MARKERS = b'\xb1\xb6\xbc\xa1\xa6\xac'
+
+# obsługa formatu {start}{end} lub [start][end]
+MICRODVD_LINE = re.compile(r"^[ \t]*[\{\[](\d+)[\}\]][\{\[](\d+)[\}\]][ \t]*([^\r\n]*)", re.MULTILINE)
+
+# Linia czasu SRT/WebVTT (w WebVTT godziny są opcjonalne) i następujące po niej
+# niepuste linie tekstu
+TIMED_CUE = re.compile(
+    r"^[ \t]*(?:(\d+):)?(\d{2}):(\d{2})[,.](\d{3})[ \t]+-->[ \t]+"
+    r"(?:(\d+):)?(\d{2}):(\d{2})[,.](\d{3})[^\r\n]*(?:\r?\n|$)"
+    r"((?:[ \t]*\S[^\r\n]*(?:\r?\n|$))*)",
+    re.MULTILINE)
+
+
+def parse_fps(value):
+    """Zamienia zapis FPS (25, 23.976, 24000/1001) na dokładny ułamek"""
+    value = str(value).strip()
+    if value in NTSC_RATES:
+        return NTSC_RATES[value]
+    try:
+        fps = Fraction(value).limit_denominator(100000)
+    except ZeroDivisionError:
+        # argparse zamienia na błąd użycia tylko ValueError/TypeError
+        raise ValueError(f"Niepoprawna liczba klatek na sekundę: {value}") from None
+    # 23.9760, 29.970 itp. też oznaczają częstotliwości NTSC
+    for rate in NTSC_RATES.values():
+        if abs(fps - rate) < Fraction(1, 1000):
+            return rate
+    if fps <= 0:
+        raise ValueError(f"Niepoprawna liczba klatek na sekundę: {value}")
+    return fps
+
+def parse_scale(value):
+    """Współczynnik rozciągnięcia czasu: liczba lub iloraz FPS (np. 23.976/25)"""
+    if '/' in str(value):
+        numerator, denominator = str(value).split('/', 1)
+        scale = parse_fps(numerator) / parse_fps(denominator)
+    else:
+        scale = Fraction(str(value)).limit_denominator(100000)
+    if scale <= 0:
+        raise ValueError(f"Niepoprawny współczynnik skali: {value}")
+    return scale
+
+def rescale(values, factor, offset=0):
+    """Mnoży tablicę liczb całkowitych przez ułamek, zaokrąglając do najbliższej
+
+    Liczone w całości na liczbach całkowitych; ujemne wyniki (po dodaniu
+    offset) są obcinane do zera.
+    """
+    # NumPy ładowany dopiero tutaj - szybki start, gdy nie ma nic do konwersji
+    import numpy as np
+
+    factor = Fraction(factor)
+    values = np.asarray(values, dtype=np.int64)
+    if values.size and int(np.abs(values).max()) * factor.numerator * 2 >= 2 ** 62:
+        # Poza zakresem int64 - liczby całkowite Pythona
+        values = values.astype(object)
+    result = (values * (2 * factor.numerator) + factor.denominator) // (2 * factor.denominator)
+    return np.maximum(result.astype(np.int64) + int(offset), 0)
+
+def frames_to_ms(frames, fps=FPS, offset_ms=0, scale=1):
+    """Zamienia tablicę numerów klatek na milisekundy (zaokrąglone do najbliższej)
+
+    Czas = klatka / fps * scale + offset, liczony w całości na liczbach
+    całkowitych, więc 24000/1001 nie gubi precyzji na długich filmach.
+    Ujemne czasy (po przesunięciu) są obcinane do zera.
+    """
+    return rescale(frames, Fraction(1000) * Fraction(scale) / Fraction(fps), offset_ms)
+
+def format_timecodes(ms, separator=','):
+    """Formatuje tablicę milisekund jako listę znaczników GG:MM:SS,mmm
+
+    Cyfry są składane wektorowo w jedną tablicę bajtów, dekodowaną raz.
+    Godziny mają co najmniej dwie cyfry (więcej, gdy napisy trwają 100 h+).
+    """
+    import numpy as np
+
+    ms = np.asarray(ms, dtype=np.int64)
+    hours, rest = np.divmod(ms, 3600000)
+    minutes, rest = np.divmod(rest, 60000)
+    seconds, millis = np.divmod(rest, 1000)
+
+    hour_width = max(2, len(str(int(hours.max())))) if ms.size else 2
+    width = hour_width + 10
+    digits = np.empty((ms.size, width), dtype=np.uint8)
+    fields = ((0, hours, hour_width), (hour_width + 1, minutes, 2),
+              (hour_width + 4, seconds, 2), (hour_width + 7, millis, 3))
+    for column, value, field_width in fields:
+        for i in range(field_width):
+            digits[:, column + field_width - 1 - i] = value // 10 ** i % 10 + ord('0')
+    digits[:, hour_width] = digits[:, hour_width + 3] = ord(':')
+    digits[:, hour_width + 6] = ord(separator)
+
+    text = digits.tobytes().decode('ascii')
+    return [text[i:i + width] for i in range(0, len(text), width)]
+
+def frame_to_timecode(frame, fps=FPS):
+    return format_timecodes(frames_to_ms([frame], fps))[0]
+
+def _count_bytes(data, markers):
+    return sum(data.count(markers[i:i + 1]) for i in range(len(markers)))
+
+def decode_subtitles(data):
+    """Dekoduje bajty napisów; zwraca (tekst, kodowanie)
+
+    Kolejno: BOM, poprawne UTF-8, a dla pozostałych plików CP1250 lub
+    ISO-8859-2 - zależnie od tego, w którym kodowaniu częściej występują
+    bajty polskich liter. Bajty 0x80-0x9F to w ISO-8859-2 znaki sterujące,
+    więc przechylają wynik na CP1250.
+    """
+    if data.startswith(b'\xef\xbb\xbf'):
+        return data[3:].decode('utf-8', errors='replace'), 'utf-8-sig'
+    if data.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return data.decode('utf-16', errors='replace'), 'utf-16'
+    try:
+        return data.decode('utf-8'), 'utf-8'
+    except UnicodeDecodeError:
+        pass
+
+    if _count_bytes(data, ISO_8859_2_MARKERS) > _count_bytes(data, CP1250_MARKERS):
+        encoding = 'iso-8859-2'
+    else:
+        encoding = 'cp1250'
+    return data.decode(encoding, errors='replace'), encoding
+
+
+class CueStore:
+    """Napisy w tablicach równoległych zamiast obiektu na każdy wpis
+
+    starts/ends to tablice int64 z czasami - w milisekundach, a gdy fps
+    nie jest None, w klatkach przy tym fps. Teksty wszystkich wpisów leżą
+    w jednym napisie text; wpis i to text[offsets[i]:offsets[i + 1]],
+    linie wpisu rozdziela znak nowej linii.
+    """
+
+    __slots__ = ('starts', 'ends', 'offsets', 'text', 'fps')
+
+    def __init__(self, starts, ends, offsets, text, fps=None):
+        self.starts = starts
+        self.ends = ends
+        self.offsets = offsets
+        self.text = text
+        self.fps = fps
+
+    @classmethod
+    def from_cues(cls, cues, fps=None):
+        """Buduje magazyn z iterowalnego (start, koniec, tekst)"""
+        import numpy as np
+
+        starts, ends, offsets = array('q'), array('q'), array('q', [0])
+        parts = []
+        length = 0
+        for start, end, cue_text in cues:
+            starts.append(start)
+            ends.append(end)
+            parts.append(cue_text)
+            length += len(cue_text)
+            offsets.append(length)
+        return cls(np.frombuffer(starts, dtype=np.int64), np.frombuffer(ends, dtype=np.int64),
+                   np.frombuffer(offsets, dtype=np.int64), ''.join(parts), fps)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def text_at(self, index):
+        return self.text[self.offsets[index]:self.offsets[index + 1]]
+
+    def iter_texts(self):
+        text = self.text
+        offsets = self.offsets.tolist()
+        for i in range(len(offsets) - 1):
+            yield text[offsets[i]:offsets[i + 1]]
+
+    def to_ms(self, offset_ms=0, scale=1):
+        """Zwraca magazyn z czasami w milisekundach, przesunięty i rozciągnięty
+
+        Teksty nie są kopiowane - nowy magazyn współdzieli je z bieżącym.
+        """
+        if self.fps is None:
+            factor = Fraction(scale)
+        else:
+            factor = Fraction(1000) * Fraction(scale) / self.fps
+        return CueStore(rescale(self.starts, factor, offset_ms), rescale(self.ends, factor, offset_ms),
+                        self.offsets, self.text)
+
+    def to_frames(self, fps):
+        """Zwraca magazyn z czasami w klatkach przy podanym fps"""
+        ms = self.to_ms()
+        factor = Fraction(fps) / 1000
+        return CueStore(rescale(ms.starts, factor), rescale(ms.ends, factor), self.offsets, self.text, Fraction(fps))
+
+
+def iter_microdvd_cues(text):
+    """Generator napisów (klatka początkowa, klatka końcowa, tekst)"""
+    for match in MICRODVD_LINE.finditer(text):
+        # zamień '|' na nową linię i usuń wiodące '/' z każdej linii
+        lines_txt = match.group(3).split('|')
+        cue_text = '\n'.join(part.lstrip('/') for part in lines_txt).strip()
+        yield int(match.group(1)), int(match.group(2)), cue_text
+
+def _skip_fps_header(cues, header):
+    """Przepuszcza napisy, pomijając nagłówek {1}{1}FPS (zapisywany do header)"""
+    cues = iter(cues)
+    for start_frame, end_frame, cue_text in cues:
+        if start_frame == end_frame and start_frame <= 1:
+            try:
+                header.append(parse_fps(cue_text))
+            except ValueError:
+                yield start_frame, end_frame, cue_text
+        else:
+            yield start_frame, end_frame, cue_text
+        break
+    yield from cues
+
+def parse_microdvd(text, fps=None, force_fps=False):
+    """Parsuje napisy MicroDVD do magazynu w klatkach
+
+    FPS pochodzi z nagłówka pliku ({1}{1}25.000 - nie trafia do wyniku
+    jako napis), a gdy go brak (lub force_fps) - z parametru fps.
+    """
+    header = []
+    store = CueStore.from_cues(_skip_fps_header(iter_microdvd_cues(text), header))
+    if header and not force_fps:
+        store.fps = header[0]
+    else:
+        store.fps = FPS if fps is None else fps
+    return store
+
+def parse_timed(text):
+    """Parsuje napisy SRT lub WebVTT do magazynu w milisekundach
+
+    Numery wpisów, nagłówek WEBVTT, bloki NOTE/STYLE i ustawienia wpisów
+    są pomijane.
+    """
+    def cues():
+        for match in TIMED_CUE.finditer(text):
+            h1, m1, s1, ms1, h2, m2, s2, ms2, cue_text = match.groups()
+            start = ((int(h1 or 0) * 60 + int(m1)) * 60 + int(s1)) * 1000 + int(ms1)
+            end = ((int(h2 or 0) * 60 + int(m2)) * 60 + int(s2)) * 1000 + int(ms2)
+            yield start, end, cue_text.strip().replace('\r\n', '\n')
+
+    return CueStore.from_cues(cues())
+
+def iter_microdvd(store, fps=None, header=True):
+    """Generator linii MicroDVD; fps domyślnie taki jak w magazynie"""
+    fps = fps or store.fps or FPS
+    if store.fps != fps:
+        store = store.to_frames(fps)
+    if header:
+        yield f"{{1}}{{1}}{float(fps):.3f}\n"
+    for start, end, cue_text in zip(store.starts.tolist(), store.ends.tolist(), store.iter_texts()):
+        yield f"{{{start}}}{{{end}}}{cue_text.replace(chr(10), '|')}\n"
+
+def iter_srt(store):
+    """Generator kolejnych wpisów SRT"""
+    ms = store.to_ms() if store.fps is not None else store
+    start_codes = format_timecodes(ms.starts)
+    end_codes = format_timecodes(ms.ends)
+    for counter, (start_time, end_time, cue_text) in enumerate(zip(start_codes, end_codes, store.iter_texts()), 1):
+        # dodajemy dodatkowy pusty wiersz między wpisami
+        yield f"{counter}\n{start_time} --> {end_time}\n{cue_text}\n\n"
+
+def iter_webvtt(store):
+    """Generator pliku WebVTT (nagłówek i kolejne wpisy)"""
+    ms = store.to_ms() if store.fps is not None else store
+    start_codes = format_timecodes(ms.starts, '.')
+    end_codes = format_timecodes(ms.ends, '.')
+    yield "WEBVTT\n\n"
+    for start_time, end_time, cue_text in zip(start_codes, end_codes, store.iter_texts()):
+        yield f"{start_time} --> {end_time}\n{cue_text}\n\n"
+
+# Nazwa formatu -> rozszerzenia plików (pierwsze używane przy zapisie)
+FORMATS = {
+    'microdvd': ('.txt', '.sub'),
+    'srt': ('.srt',),
+    'vtt': ('.vtt',),
+}
+
+def format_for_path(path):
+    """Zgaduje format napisów po rozszerzeniu pliku"""
+    ext = os.path.splitext(path)[1].lower()
+    for name, extensions in FORMATS.items():
+        if ext in extensions:
+            return name
+    raise ValueError(f"Nieznany format napisów: {path}")
+
+def load_subtitles(path, file_format=None, data=None, fps=None, force_fps=False):
+    """Wczytuje plik napisów (jeden odczyt) do CueStore
+
+    fps i force_fps dotyczą tylko MicroDVD (patrz parse_microdvd).
+    """
+    if data is None:
+        with open(path, 'rb') as f:
+            data = f.read()
+    text, _ = decode_subtitles(data)
+    if (file_format or format_for_path(path)) == 'microdvd':
+        return parse_microdvd(text, fps=fps, force_fps=force_fps)
+    return parse_timed(text)
+
+def save_subtitles(store, path, file_format=None, fps=None):
+    """Zapisuje CueStore strumieniowo do pliku w UTF-8
+
+    fps dotyczy tylko zapisu MicroDVD z magazynu w milisekundach.
+    """
+    file_format = file_format or format_for_path(path)
+    if file_format == 'microdvd':
+        chunks = iter_microdvd(store, fps)
+    elif file_format == 'srt':
+        chunks = iter_srt(store)
+    else:
+        chunks = iter_webvtt(store)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.writelines(chunks)
+
+def convert_subtitles(src_path, dst_path, src_format=None, dst_format=None, data=None,
+                      fps=None, force_fps=False, offset_ms=0, scale=1):
+    """Konwertuje plik napisów między dowolną parą formatów; zwraca liczbę wpisów
+
+    fps i force_fps dotyczą wejścia MicroDVD; wyjście MicroDVD używa fps
+    wejścia (lub fps, gdy wejście ma czasy w milisekundach).
+    """
+    with timings.phase('load'):
+        store = load_subtitles(src_path, src_format, data, fps=fps, force_fps=force_fps)
+    out_fps = store.fps or fps
+    if offset_ms or scale != 1:
+        with timings.phase('retime'):
+            store = store.to_ms(offset_ms, scale)
+    with timings.phase('save'):
+        save_subtitles(store, dst_path, dst_format, fps=out_fps)
+    return len(store)
+
+def _convert_to(src_path, dst_format, **options):
+    """Zadanie dla puli procesów; zwraca komunikat błędu lub None"""
+    dst_path = os.path.splitext(src_path)[0] + FORMATS[dst_format][0]
+    try:
+        convert_subtitles(src_path, dst_path, dst_format=dst_format, **options)
+    except Exception as e:
+        return str(e)
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Konwertuje napisy między formatami MicroDVD, SRT i WebVTT")
+    parser.add_argument("files", nargs='+', help="Pliki napisów (format rozpoznawany po rozszerzeniu)")
+    parser.add_argument("--to", required=True, choices=sorted(FORMATS),
+                        help="Format wyjściowy (plik obok źródła, z nowym rozszerzeniem)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument("--fps", type=parse_fps,
+                        help="FPS napisów MicroDVD bez nagłówka (domyślnie 23.976)")
+    parser.add_argument("--force-fps", action="store_true",
+                        help="Używaj --fps także dla plików z nagłówkiem")
+    parser.add_argument("--offset", type=float, default=0.0, metavar="SEKUNDY",
+                        help="Przesunięcie wszystkich napisów (może być ujemne)")
+    parser.add_argument("--scale", type=parse_scale, default=Fraction(1),
+                        help="Rozciągnięcie czasu, np. 1.001 albo 23.976/25")
+    timings.add_arguments(parser)
+    args = parser.parse_args()
+
+    for path in args.files:
+        if not os.path.isfile(path):
+            print(f"Błąd: Plik {path} nie istnieje!")
+            sys.exit(1)
+
+    convert = partial(_convert_to, dst_format=args.to, fps=args.fps, force_fps=args.force_fps,
+                      offset_ms=round(args.offset * 1000), scale=args.scale)
+    with timings.session(args):
+        with timings.phase('convert'):
+            if args.jobs > 1 and len(args.files) > 1:
+                from concurrent.futures import ProcessPoolExecutor
+                with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                    results = list(executor.map(convert, args.files,
+                                                chunksize=max(1, len(args.files) // (args.jobs * 8))))
+            else:
+                results = list(map(convert, args.files))
+            if timings.enabled():
+                timings.count(files=len(args.files),
+                              nbytes=sum(os.path.getsize(path) for path in args.files))
+
+        failed = 0
+        for path, error in zip(args.files, results):
+            if error is None:
+                print(f"✔️ Skonwertowano: {path}")
+            else:
+                failed += 1
+                print(f"❌ Błąd przy konwersji {path}: {error}")
+        print(f"Skonwertowano: {len(results) - failed}, błędy: {failed}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Pomiar czasu faz i profilowanie narzędzi (opcje --timings i --profile)
+
+Narzędzia oznaczają fazy pracy przez `with timings.phase('scan'):` (lub
+iter_phase dla generatorów) i zliczają pliki oraz bajty przez count().
+Praca w wątkach pomocniczych trafia do raportu przez record().
+Bez --timings/--profile phase() i count() nic nie mierzą, więc narzut
+przy zwykłym uruchomieniu to jedno sprawdzenie zmiennej.
+
+Raport JSON zawiera czas całkowity, czas i liczniki każdej fazy, a z
+--profile także najdroższe funkcje (cProfile) lub miejsca alokacji
+pamięci (tracemalloc).
+"""
+import os
+import sys
+import time
+
+# Liczba pozycji w sekcjach profilu
+PROFILE_TOP = 30
+
+# Aktywny raport albo None (pomiar wyłączony). Moduł importuje tylko lekkie
+# moduły - reszta dopiero po włączeniu pomiaru, żeby nie wydłużać startu narzędzi
+_report = None
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ('report', 'name', 'started')
+
+    def __init__(self, report, name):
+        self.report = report
+        self.name = name
+
+    def __enter__(self):
+        self.report.stack.append(self.name)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        self.report.stack.pop()
+        self.report.add(self.name, elapsed)
+        return False
+
+
+class Report:
+    """Czasy i liczniki faz jednego uruchomienia narzędzia"""
+    __slots__ = ('prog', 'argv', 'started_at', 'started', 'cpu_started', 'phases', 'stack',
+                 'files', 'bytes', 'lock')
+
+    def __init__(self, prog, argv):
+        import threading
+        from datetime import datetime
+
+        self.prog = prog
+        self.argv = list(argv)
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        # nazwa fazy -> liczniki; kolejność = kolejność pierwszego wejścia
+        self.phases = {}
+        # Fazy otwarte w wątku głównym (count() dolicza do ostatniej);
+        # phase() wywołuje się tylko z wątku głównego
+        self.stack = []
+        self.files = 0
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def stats(self, name):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = {'seconds': 0.0, 'calls': 0, 'files': 0, 'bytes': 0}
+        return stats
+
+    def add(self, name, seconds, calls=1, files=0, nbytes=0):
+        with self.lock:
+            stats = self.stats(name)
+            stats['seconds'] += seconds
+            stats['calls'] += calls
+            if files or nbytes:
+                stats['files'] += files
+                stats['bytes'] += nbytes
+                self.files += files
+                self.bytes += nbytes
+
+    def count(self, files, nbytes):
+        with self.lock:
+            self.files += files
+            self.bytes += nbytes
+            if self.stack:
+                stats = self.stats(self.stack[-1])
+                stats['files'] += files
+                stats['bytes'] += nbytes
+
+    def to_dict(self):
+        data = {
+            'prog': self.prog,
+            'argv': self.argv,
+            'started_at': self.started_at,
+            'wall_seconds': round(time.perf_counter() - self.started, 6),
+            'cpu_seconds': round(time.process_time() - self.cpu_started, 6),
+            'files': self.files,
+            'bytes': self.bytes,
+            'phases': [{'name': name, **stats, 'seconds': round(stats['seconds'], 6)}
+                       for name, stats in self.phases.items()],
+        }
+        try:
+            import resource
+        except ImportError:  # Windows
+            pass
+        else:
+            # ru_maxrss: kilobajty na Linuksie, bajty na macOS
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            data['max_rss_bytes'] = max_rss if sys.platform == 'darwin' else max_rss * 1024
+        return data
+
+
+def phase(name):
+    """Kontekst mierzący fazę name (czas sumowany przy kolejnych wejściach)"""
+    report = _report
+    if report is None:
+        return _NULL_PHASE
+    return _Phase(report, name)
+
+def iter_phase(name, iterable):
+    """Przekazuje elementy iterable, doliczając czas ich wytwarzania do fazy name
+
+    Dla generatorów przeplatanych z inną pracą (np. skan drzewa konsumowany
+    na bieżąco) - czas przetwarzania elementów nie trafia do name.
+    """
+    if _report is None:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        with phase(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+def count(files=0, nbytes=0):
+    """Dolicza pliki i bajty do bieżącej fazy wątku głównego i do sumy"""
+    report = _report
+    if report is not None:
+        report.count(files, nbytes)
+
+def record(name, seconds, files=0, nbytes=0):
+    """Dolicza gotowy pomiar do fazy name - dla pracy w wątkach pomocniczych
+
+    Czas takiej fazy to suma czasów wątków, więc może przekraczać czas całkowity.
+    """
+    report = _report
+    if report is not None:
+        report.add(name, seconds, 1, files, nbytes)
+
+def enabled():
+    """Czy pomiar jest włączony - dla liczników, których policzenie coś kosztuje"""
+    return _report is not None
+
+
+def add_arguments(parser):
+    """Dodaje do parsera argparse wspólne opcje --timings i --profile"""
+    group = parser.add_argument_group("pomiar wydajności")
+    group.add_argument("--timings", metavar="PLIK",
+                       help="Zapisz raport JSON: czasy faz, liczba plików i bajtów ('-' = stderr)")
+    group.add_argument("--profile", action="append", choices=("cpu", "memory"),
+                       help="Dołącz do raportu profil cProfile (cpu) lub tracemalloc (memory); "
+                            "bez --timings raport trafia na stderr")
+    return group
+
+def _cpu_profile(profiler):
+    import pstats
+
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+        rows.append({'function': f"{filename}:{line}({function})", 'calls': calls,
+                     'total_seconds': round(total, 6), 'cumulative_seconds': round(cumulative, 6)})
+    rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+    return rows[:PROFILE_TOP]
+
+def _memory_profile(snapshot, current, peak):
+    top = [{'where': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            'bytes': stat.size, 'blocks': stat.count}
+           for stat in snapshot.statistics('lineno')[:PROFILE_TOP]]
+    return {'current_bytes': current, 'peak_bytes': peak, 'top': top}
+
+def write_report(data, path):
+    import json
+
+    text = json.dumps(data, indent=2, ensure_ascii=False)
+    if path == '-':
+        print(text, file=sys.stderr)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+def session(args, prog=None):
+    """Włącza pomiar na czas bloku with, jeśli args ma --timings lub --profile
+
+    Raport zapisywany jest także wtedy, gdy narzędzie kończy się przez
+    sys.exit, wyjątek albo Ctrl+C.
+    """
+    return _Session(args, prog)
+
+class _Session:
+    __slots__ = ('path', 'profiles', 'prog', 'report', 'profiler')
+
+    def __init__(self, args, prog=None):
+        self.path = getattr(args, 'timings', None)
+        self.profiles = getattr(args, 'profile', None) or ()
+        self.prog = prog or os.path.basename(sys.argv[0])
+        self.report = None
+        self.profiler = None
+
+    def __enter__(self):
+        global _report
+        if self.path is None and not self.profiles:
+            return None
+        self.report = _report = Report(self.prog, sys.argv[1:])
+        if 'memory' in self.profiles:
+            import tracemalloc
+            tracemalloc.start()
+        if 'cpu' in self.profiles:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        return self.report
+
+    def __exit__(self, *exc):
+        global _report
+        if self.report is None:
+            return False
+        if self.profiler is not None:
+            self.profiler.disable()
+        _report = None
+
+        data = self.report.to_dict()
+        if self.profiler is not None:
+            data['cpu_profile'] = _cpu_profile(self.profiler)
+        if 'memory' in self.profiles:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            data['memory_profile'] = _memory_profile(snapshot, current, peak)
+        write_report(data, self.path or '-')
+        return False
@@ -0,0 +1,82 @@
+"""Wspólne wejście do wszystkich narzędzi: utils <polecenie> [argumenty]
+
+Moduł narzędzia jest importowany dopiero po wybraniu polecenia, więc start
+nie płaci za zależności pozostałych narzędzi (matplotlib, NumPy, Selenium).
+Argumenty po nazwie polecenia trafiają bez zmian do main() narzędzia.
+"""
+import sys
+import importlib
+
+# polecenie -> (podkatalog lub None, moduł, opis)
+COMMANDS = {
+    'count': (None, 'count_lines', "Liczenie linii kodu"),
+    'strip': (None, 'remove_comments', "Usuwanie komentarzy z kodu"),
+    'delvenv': (None, 'delvenv', "Usuwanie środowisk wirtualnych"),
+    'srt': (None, 'microdvd_to_srt', "Konwersja napisów MicroDVD do SRT"),
+    'subs': (None, 'subtitles', "Konwersja napisów między MicroDVD, SRT i WebVTT"),
+    'gpx': ('gpx', None, "Narzędzia GPX (cache, index, simplify, rename)"),
+    'flickr': ('flickr', 'main', "Pobieranie albumu Flickr"),
+    'dedup': ('flickr', 'dedup_photo_urls', "Usuwanie duplikatów z photo_urls.txt"),
+}
+
+# utils gpx <polecenie> -> moduł z katalogu gpx
+GPX_COMMANDS = {
+    'cache': ('gpx_cache', "Binarny cache tracków"),
+    'index': ('gpx_index', "Indeks przestrzenny i czasowy archiwum"),
+    'simplify': ('gpx_simplify', "Upraszczanie tracków"),
+    'rename': ('rename_gpx_by_date', "Zmiana nazw plików według daty"),
+}
+
+PROG = 'utils'
+
+
+def _print_usage(commands, prog, out=sys.stdout):
+    print(f"Użycie: {prog} <polecenie> [argumenty]\n", file=out)
+    print("Polecenia:", file=out)
+    for name, entry in commands.items():
+        print(f"  {name:<10} {entry[-1]}", file=out)
+    print(f"\nPomoc dla polecenia: {prog} <polecenie> --help", file=out)
+
+
+def load_command(subdir, module_name):
+    """Importuje moduł narzędzia; podkatalogi gpx i flickr to pakiety"""
+    if subdir is not None:
+        module_name = f"{subdir}.{module_name}"
+    return importlib.import_module(module_name)
+
+
+def _select(commands, argv, prog):
+    """Zwraca (wpis polecenia, pozostałe argumenty) albo kończy program z pomocą"""
+    if not argv or argv[0] in ('-h', '--help'):
+        _print_usage(commands, prog)
+        sys.exit(0)
+    name = argv[0]
+    if name not in commands:
+        print(f"{prog}: nieznane polecenie '{name}'\n", file=sys.stderr)
+        _print_usage(commands, prog, out=sys.stderr)
+        sys.exit(2)
+    return commands[name], argv[1:]
+
+
+def run(argv=None):
+    """Uruchamia polecenie; argv bez nazwy programu (domyślnie sys.argv[1:])"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+
+    (subdir, module_name, _), rest = _select(COMMANDS, argv, PROG)
+    prog = f"{PROG} {argv[0]}"
+    if module_name is None:
+        (module_name, _), rest = _select(GPX_COMMANDS, rest, prog)
+        prog = f"{prog} {argv[1]}"
+
+    module = load_command(subdir, module_name)
+    # Narzędzia czytają argumenty z sys.argv (argparse lub bezpośrednio)
+    sys.argv = [prog] + rest
+    return module.main()
+
+
+def main():
+    sys.exit(run())
+
+
+if __name__ == "__main__":
+    main()